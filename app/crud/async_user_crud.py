@@ -0,0 +1,143 @@
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException
+from typing import List, Optional
+from app.crud.user_crud import LOGIN_BY_MOBILE, USER_BY_ID, USER_BY_MOBILE, USERS_BY_ROLE
+from app.models.user import User
+from app.utils.inserts import insert_if_absent
+
+
+class AsyncUserCRUD:
+    """Async counterpart of UserCRUD for the AsyncSession stack (DB_ASYNC=True)."""
+
+    @staticmethod
+    async def insert_user(
+        db: AsyncSession,
+        mobile_number: str,
+        name: str,
+        email: Optional[str] = None,
+        company_name: Optional[str] = None,
+        hashed_password: Optional[str] = None,
+        role: Optional[str] = "client",
+        location: Optional[str] = None,
+    ) -> Optional[User]:
+        """Создать пользователя одним INSERT ... ON CONFLICT; None, если номер уже занят"""
+        valid_roles = ["client", "executor", "admin"]
+        if role not in valid_roles:
+            raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}")
+
+        values = {
+            "mobile_number": mobile_number,
+            "name": name,
+            "email": email,
+            "company_name": company_name,
+            "hashed_password": hashed_password,
+            "role": role,
+            "location": location,
+        }
+        try:
+            new_user = (await db.scalars(insert_if_absent(db, User, ["mobile_number"], values))).first()
+            if new_user is None:
+                await db.rollback()
+                return None
+            await db.commit()
+            return new_user
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Mobile number or email already registered")
+
+    @staticmethod
+    async def create_user(
+        db: AsyncSession,
+        mobile_number: str,
+        name: str,
+        email: Optional[str] = None,
+        company_name: Optional[str] = None,
+        hashed_password: Optional[str] = None,
+        role: Optional[str] = "client",
+        location: Optional[str] = None,
+    ) -> User:
+        """Создать пользователя"""
+        new_user = await AsyncUserCRUD.insert_user(
+            db, mobile_number, name, email, company_name, hashed_password, role, location
+        )
+        if new_user is None:
+            raise HTTPException(status_code=409, detail="Mobile number or email already registered")
+        return new_user
+
+    @staticmethod
+    async def get_user(
+        db: AsyncSession, user_id: Optional[int] = None, mobile_number: Optional[str] = None
+    ) -> Optional[User]:
+        """Получить пользователя по ID или номеру телефона"""
+        if user_id:
+            user = await db.scalar(USER_BY_ID, {"user_id": user_id})
+            if user:
+                return user
+
+        if mobile_number:
+            return await db.scalar(USER_BY_MOBILE, {"mobile_number": mobile_number})
+        raise HTTPException(status_code=400, detail="User ID or Mobile Number is required")
+
+    @staticmethod
+    async def get_login(db: AsyncSession, mobile_number: str) -> Optional[Row]:
+        """(id, mobile_number, role) пользователя для входа, без ORM-объекта; None, если не найден"""
+        conn = await db.connection()
+        return (await conn.execute(LOGIN_BY_MOBILE, {"mobile_number": mobile_number})).first()
+
+    @staticmethod
+    async def update_user(
+        db: AsyncSession,
+        user_id: int,
+        name: Optional[str] = None,
+        email: Optional[str] = None,
+        company_name: Optional[str] = None,
+        location: Optional[str] = None,
+    ) -> User:
+        """Обновить пользователя"""
+        user = await db.scalar(USER_BY_ID, {"user_id": user_id})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        if name:
+            user.name = name
+        if email:
+            user.email = email
+        if company_name:
+            user.company_name = company_name
+        if location:
+            user.location = location
+
+        try:
+            await db.commit()
+            await db.refresh(user)
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Email already in use")
+        return user
+
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: int, requester_role: str):
+        """Удалить пользователя (только для админа)"""
+        user = await db.scalar(USER_BY_ID, {"user_id": user_id})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if requester_role != "admin":
+            raise HTTPException(status_code=403, detail="Only admins can delete users")
+
+        await db.delete(user)
+        await db.commit()
+        return {"detail": f"User {user_id} deleted"}
+
+    @staticmethod
+    async def filter_users_by_role(db: AsyncSession, role: str) -> List[User]:
+        """Фильтрация пользователей по роли"""
+        valid_roles = ["client", "executor", "admin"]
+        if role not in valid_roles:
+            raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}")
+
+        users = (await db.scalars(USERS_BY_ROLE, {"role": role})).all()
+        if not users:
+            raise HTTPException(status_code=404, detail="No users found with this role")
+        return list(users)
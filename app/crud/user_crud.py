@@ -1,11 +1,61 @@
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from typing import List, Optional
 from app.models.user import User
+from app.utils.inserts import insert_if_absent
+
+
+# Hot lookups built once with bound parameters: no per-call construction, and their
+# compiled form stays in the engine's statement cache (shared with AsyncUserCRUD)
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_MOBILE = select(User).where(User.mobile_number == bindparam("mobile_number"))
+USERS_BY_ROLE = select(User).where(User.role == bindparam("role"))
+# Columns only: executed on the session's connection, rows instead of identity-mapped objects
+LOGIN_BY_MOBILE = select(User.id, User.mobile_number, User.role).where(User.mobile_number == bindparam("mobile_number"))
 
 
 class UserCRUD:
+    @staticmethod
+    def insert_user(
+        db: Session,
+        mobile_number: str,
+        name: str,
+        email: Optional[str] = None,
+        company_name: Optional[str] = None,
+        hashed_password: Optional[str] = None,
+        role: Optional[str] = "client",
+        location: Optional[str] = None,
+    ) -> Optional[User]:
+        """Создать пользователя одним INSERT ... ON CONFLICT; None, если номер уже занят"""
+        valid_roles = ["client", "executor", "admin"]
+        if role not in valid_roles:
+            raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}")
+
+        values = {
+            "mobile_number": mobile_number,
+            "name": name,
+            "email": email,
+            "company_name": company_name,
+            "hashed_password": hashed_password,
+            "role": role,
+            "location": location,
+        }
+        try:
+            new_user = db.scalars(insert_if_absent(db, User, ["mobile_number"], values)).first()
+            if new_user is None:
+                db.rollback()
+                return None
+            # Detached before commit, so it keeps the RETURNING values instead of being expired and re-read
+            db.expunge(new_user)
+            db.commit()
+            return new_user
+        except IntegrityError:
+            # Only the email can still collide
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Mobile number or email already registered")
+
     @staticmethod
     def create_user(
         db: Session,
@@ -22,40 +72,23 @@ class UserCRUD:
         #"DUPLICATE_ENTRY": {"status_code": 409, "detail": "Mobile number or email already registered."},
         #"NOT_FOUND": {"status_code": 404, "detail": "User not found."},
         #"UNAUTHORIZED_ACTION": {"status_code": 403, "detail": "Only admins can delete users."},
-        try:
-            # Validate role
-            valid_roles = ["client", "executor", "admin"]
-            if role not in valid_roles:
-                raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}")
-
-            new_user = User(
-                mobile_number=mobile_number,
-                name=name,
-                email=email,
-                company_name=company_name,
-                hashed_password=hashed_password,
-                role=role,
-                location=location,
-            )
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            return new_user
-        except IntegrityError:
-            db.rollback()
+        new_user = UserCRUD.insert_user(
+            db, mobile_number, name, email, company_name, hashed_password, role, location
+        )
+        if new_user is None:
             raise HTTPException(status_code=409, detail="Mobile number or email already registered")
+        return new_user
 
     @staticmethod
     def get_user(db: Session, user_id: Optional[int] = None, mobile_number: Optional[str] = None) -> User:
         """Получить пользователя по ID или номеру телефона"""
-        query = db.query(User)
         if user_id:
-            user = query.filter(User.id == user_id).first()
+            user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
             if user:
                 return user
 
         if mobile_number:
-            user = query.filter(User.mobile_number == mobile_number).first()
+            user = db.scalars(USER_BY_MOBILE, {"mobile_number": mobile_number}).first()
             if user:
                 return user
         else:
@@ -64,6 +97,11 @@ class UserCRUD:
         if not user:
             return None
 
+    @staticmethod
+    def get_login(db: Session, mobile_number: str) -> Optional[Row]:
+        """(id, mobile_number, role) пользователя для входа, без ORM-объекта; None, если не найден"""
+        return db.connection().execute(LOGIN_BY_MOBILE, {"mobile_number": mobile_number}).first()
+
     @staticmethod
     def update_user(
         db: Session,
@@ -74,7 +112,7 @@ class UserCRUD:
         location: Optional[str] = None,
     ) -> User:
         """Обновить пользователя"""
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -98,7 +136,7 @@ class UserCRUD:
     @staticmethod
     def delete_user(db: Session, user_id: int, requester_role: str):
         """Удалить пользователя (только для админа)"""
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         if requester_role != "admin":
@@ -115,7 +153,7 @@ class UserCRUD:
         if role not in valid_roles:
             raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}")
         
-        users = db.query(User).filter(User.role == role).all()
+        users = db.scalars(USERS_BY_ROLE, {"role": role}).all()
         if not users:
             raise HTTPException(status_code=404, detail="No users found with this role")
         return users
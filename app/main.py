@@ -1,18 +1,54 @@
+import logging
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes.auth import router as auth_router
-from app.routes.users import router as user_router
-from app.routes.executors import router as executor_router
-from app.routes.requests import router as request_router
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from app.models.database import DB_ASYNC, DB_POOL_PREWARM, engine, async_engine, replica_set, async_replica_set
+from app.utils.db_pool import pool_stats, prewarm, prewarm_async
+from app.utils.metrics import MetricsMiddleware, metrics_registry
+from app.utils.admission import AdmissionMiddleware, admission_controller
+from app.utils.idempotency import IdempotencyMiddleware, idempotency_guard
+from app.utils.routing_cache import routing_cache
+from app.utils.push import push_listener, request_hub
+from app.routes.imports import router as import_router
+from app.utils.hashing import password_hasher
+from app.utils.outbox import OUTBOX_RELAY_ENABLED, outbox_relay
+from app.utils.partitions import PARTITION_MAINTENANCE_ENABLED, partition_maintainer
+
+# DB_ASYNC выбирает async-версии маршрутов (AsyncEngine) вместо sync
+if DB_ASYNC:
+    from app.routes.aio.auth import router as auth_router
+    from app.routes.aio.users import router as user_router
+    from app.routes.aio.executors import router as executor_router
+    from app.routes.aio.requests import router as request_router
+    from app.routes.aio.stats import router as stats_router
+else:
+    from app.routes.auth import router as auth_router
+    from app.routes.users import router as user_router
+    from app.routes.executors import router as executor_router
+    from app.routes.requests import router as request_router
+    from app.routes.stats import router as stats_router
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 # Создаем приложение FastAPI
 app = FastAPI(
     title="Service Platform API",
     description="API для управления пользователями, исполнителями, запросами и авторизацией",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# Лимиты параллельности по классам маршрутов (auth/write/read/list) и rate limit для send-sms;
+# внутри CORS, чтобы ответы 503/429 тоже получали CORS-заголовки
+app.add_middleware(AdmissionMiddleware)
+
+# Idempotency-Key на POST-создании: повтор получает сохраненный ответ, не доходя до маршрута;
+# снаружи admission, чтобы повторы не занимали слоты, а ответы 503/429 не сохранялись
+app.add_middleware(IdempotencyMiddleware)
+
 # Разрешаем CORS для доступа из браузера
 app.add_middleware(
     CORSMiddleware,
@@ -22,16 +58,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Латентность по маршрутам и число SQL-запросов на запрос (см. /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Прогреваем пул соединений, чтобы первый запрос после деплоя не открывал их сам
+@app.on_event("startup")
+async def prewarm_db_pool():
+    if DB_POOL_PREWARM <= 0:
+        return
+    # База недоступна — стартуем все равно, соединения откроются лениво при первых запросах
+    try:
+        if DB_ASYNC:
+            await prewarm_async(async_engine, DB_POOL_PREWARM)
+        else:
+            await run_in_threadpool(prewarm, engine, DB_POOL_PREWARM)
+    except Exception:
+        logger.exception("Connection pool prewarm failed, connecting lazily")
+
+# Фоновая публикация событий из outbox в Kafka
+@app.on_event("startup")
+async def start_outbox_relay():
+    if OUTBOX_RELAY_ENABLED:
+        await outbox_relay.start()
+
+@app.on_event("shutdown")
+async def stop_outbox_relay():
+    await outbox_relay.stop()
+
+# Доставка новых заявок подписчикам всех воркеров через LISTEN/NOTIFY
+@app.on_event("startup")
+async def start_push_listener():
+    if request_hub.fanout == "postgres":
+        await push_listener.start()
+
+@app.on_event("shutdown")
+async def stop_push_listener():
+    await push_listener.stop()
+
+# Заранее создаем месячные партиции requests (Postgres)
+@app.on_event("startup")
+async def start_partition_maintenance():
+    if PARTITION_MAINTENANCE_ENABLED:
+        await partition_maintainer.start()
+
+@app.on_event("shutdown")
+async def stop_partition_maintenance():
+    await partition_maintainer.stop()
+
+# Останавливаем пул хеширования паролей
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
 # Корневой эндпоинт
 @app.get("/")
 def read_root():
     return {"message": "Добро пожаловать в Service Platform API!"}
 
+# Состояние пула соединений БД этого воркера
+@app.get("/pool/stats")
+def read_pool_stats():
+    stats = {"sync": pool_stats(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine)
+    if replica_set:
+        stats["replicas"] = replica_set.stats()
+    if async_replica_set:
+        stats["async_replicas"] = async_replica_set.stats()
+    return stats
+
+# Очереди и отказы admission control
+@app.get("/admission/stats")
+def read_admission_stats():
+    return admission_controller.stats()
+
+# Сохраненные ответы и повторы по Idempotency-Key
+@app.get("/idempotency/stats")
+def read_idempotency_stats():
+    return idempotency_guard.stats()
+
+# Метрики в формате Prometheus
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    gauges, counters = {}, {}
+    for name, value in pool_stats(engine).items():
+        if isinstance(value, (int, float)):
+            (counters if name in ("checkouts", "timeouts") else gauges)[f"db_pool_{name}"] = value
+    hashing = password_hasher.stats()
+    gauges["password_hash_in_flight"] = hashing["in_flight"]
+    gauges["password_hash_queue_depth"] = hashing["queue_depth"]
+    counters["password_hash_rejected"] = hashing["rejected"]
+    for name, stats in admission_controller.stats()["classes"].items():
+        gauges[f"admission_{name}_active"] = stats["active"]
+        gauges[f"admission_{name}_queued"] = stats["queued"]
+        counters[f"admission_{name}_rejected_queue_full"] = stats["rejected_queue_full"]
+        counters[f"admission_{name}_rejected_timeout"] = stats["rejected_timeout"]
+    replicas = (async_replica_set if DB_ASYNC else replica_set).stats()
+    gauges["db_replicas_healthy"] = sum(replica["healthy"] for replica in replicas["replicas"])
+    counters["db_replica_primary_fallbacks"] = replicas["primary_fallbacks"]
+    counters["db_replica_sticky_reads"] = replicas["sticky_reads"]
+    push = request_hub.stats()
+    gauges["push_subscribers"] = push["subscribers"]
+    counters["push_delivered"] = push["delivered"]
+    counters["push_evicted"] = push["evicted"]
+    counters["partition_maintenance_failures"] = partition_maintainer.failures
+    counters["idempotency_replays"] = idempotency_guard.replays
+    counters["idempotency_conflicts"] = idempotency_guard.conflicts
+    cache = routing_cache.stats()
+    counters["routing_cache_hits"] = cache["hits"]
+    counters["routing_cache_misses"] = cache["misses"]
+    return PlainTextResponse(metrics_registry.render(gauges, counters), media_type="text/plain; version=0.0.4")
+
 # Подключаем маршруты
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(user_router, prefix="/users", tags=["users"])
 app.include_router(executor_router, prefix="/executors", tags=["executors"])
 app.include_router(request_router, prefix="/requests", tags=["requests"])
+app.include_router(import_router, prefix="/imports", tags=["imports"])
+app.include_router(stats_router, prefix="/stats", tags=["stats"])
 
 # Для запуска сервера
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint, func, text
+from app.models.database import Base
+
+class Assignment(Base):
+    __tablename__ = "assignments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No FK: a foreign key to the partitioned requests table would need created_at too
+    request_id = Column(Integer, nullable=False)
+    executor_id = Column(Integer, ForeignKey("executors.id"), nullable=False)
+    assigned_at = Column(DateTime, nullable=False, server_default=func.now())
+    closed_at = Column(DateTime, nullable=True)  # NULL while the request is open
+
+    __table_args__ = (
+        UniqueConstraint("request_id", "executor_id", name="uq_assignments_request_executor"),
+        # Open load per executor, read when the load index (re)loads a role
+        Index("ix_assignments_open_executor", "executor_id", postgresql_where=text("closed_at IS NULL")),
+    )
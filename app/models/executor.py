@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
 
@@ -13,3 +13,12 @@ class Executor(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, nullable=False)  # Define specific executor roles (e.g., "tech_support", "legal_advice")
     group = Column(String, nullable=True)  # Group executor belongs to
+    # Bumped by the ORM on every UPDATE; name/group appear in request responses and their ETags
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    # Executor-by-role lookups ordered by id
+    __table_args__ = (
+        Index("ix_executors_role_id", "role", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func, text
+from app.models.database import Base
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False)
+    key = Column(String, nullable=True)  # Kafka message key (e.g. request category)
+    payload = Column(Text, nullable=False)  # JSON-encoded event body
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    published_at = Column(DateTime, nullable=True)  # NULL until relayed to the broker
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # The relay only ever scans unpublished rows
+    __table_args__ = (
+        Index("ix_outbox_events_unpublished", "id", postgresql_where=text("published_at IS NULL")),
+    )
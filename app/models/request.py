@@ -1,20 +1,38 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Time, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Time, DateTime, Index, func
+from sqlalchemy.orm import deferred, relationship
 from app.models.database import Base
 
 class Request(Base):
     __tablename__ = "requests"
 
+    # On Postgres the key is (id, created_at): the table is range-partitioned by month on
+    # created_at (migration e5c1a7d3b9f2, app.utils.partitions); id alone stays unique via the sequence
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, index=True, nullable=False)
-    description = Column(Text, nullable=False)
+    # Unbounded text: not loaded with the entity, routes select it explicitly when asked for
+    description = deferred(Column(Text, nullable=False))
     status = Column(String, default="open")  # Options: open, closed, pending
     budget = Column(Integer, nullable=True)
     category = Column(String, nullable=False)  # E.g., "IT", "HR"
     approximate_time_required = Column(Integer, nullable=True)  # Approximate time in hours
     help_day = Column(String, nullable=True)  # Preferred day (e.g., "Monday")
     preferred_time = Column(Time, nullable=True)  # Preferred time of day
+    # Bumped by the ORM on every UPDATE, feeds the ETag of GET responses
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    closed_at = Column(DateTime, nullable=True)  # Set when the request is closed
+    # search_vector (tsvector, GIN) exists only in Postgres, see migration 8b1e4d2f6a90
 
     # Relationship to the user
     user = relationship("User", back_populates="requests")
+
+    # Match the listing filters + keyset order (see migration a4d6c2e9f1b7)
+    __table_args__ = (
+        Index("ix_requests_category_status_id", "category", "status", "id"),
+        Index("ix_requests_status_id", "status", "id"),
+        Index("ix_requests_user_id", "user_id"),
+    )
+    # Optimistic locking: concurrent updates of the same version raise StaleDataError
+    __mapper_args__ = {"version_id_col": version}
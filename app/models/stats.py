@@ -0,0 +1,30 @@
+from sqlalchemy import BigInteger, Column, DateTime, SmallInteger, String, func
+from app.models.database import Base
+
+# Dashboard counters, maintained in the transaction that changes the counted rows
+# (see app.utils.stats). Each key is spread over STATS_SLOTS rows so concurrent
+# writers of the same category don't queue on one row lock; readers sum the slots.
+
+class RequestStats(Base):
+    __tablename__ = "request_stats"
+
+    category = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)  # "" for requests without a status
+    slot = Column(SmallInteger, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    budget_total = Column(BigInteger, nullable=False, default=0)
+
+class ExecutorStats(Base):
+    __tablename__ = "executor_stats"
+
+    role = Column(String, primary_key=True)
+    group = Column(String, primary_key=True)  # "" for executors without a group
+    slot = Column(SmallInteger, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+class ArchivedPartition(Base):
+    """Partitions moved to requests_archive whose rows were taken out of request_stats."""
+    __tablename__ = "request_stats_archived"
+
+    partition = Column(String, primary_key=True)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -11,7 +11,7 @@ class User(Base):
     email = Column(String, unique=True, nullable=True)
     company_name = Column(String, nullable=True)
     hashed_password = Column(String, nullable=True)
-    role = Column(String, nullable=False, default="client")
+    role = Column(String, nullable=False, default="client", index=True)
     location = Column(String, nullable=True)
 
 
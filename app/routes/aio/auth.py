@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_async_db
+from app.crud.async_user_crud import AsyncUserCRUD
+from app.routes.auth import ALLOWED_ROLES, UserRegister, LoginRequest, Token, send_sms, hashing_stats, token_cache_stats
+from app.routes.users import UserRegistered
+from app.utils.auth import CurrentUser, get_current_user_async
+from app.utils.security import create_access_token, verify_sms_code, hash_password_async
+
+
+router = APIRouter()
+
+@router.post("/register", response_model=UserRegistered)
+async def register_user(user: UserRegister, db: AsyncSession = Depends(get_async_db)):
+    """
+    Регистрация нового пользователя (async).
+    """
+    if user.role not in ALLOWED_ROLES:
+        raise HTTPException(status_code=400, detail=f"Invalid role. Allowed roles: {ALLOWED_ROLES}")
+
+    hashed_password = await hash_password_async(user.password)
+
+    approved_role = user.role if user.role != "admin" else "pending_admin"
+
+    new_user = await AsyncUserCRUD.insert_user(
+        db=db,
+        mobile_number=user.mobile_number,
+        name=user.name,
+        email=user.email,
+        company_name=user.company_name,
+        hashed_password=hashed_password,
+        role=approved_role,
+        location=user.location,
+    )
+    if new_user is None:
+        raise HTTPException(status_code=400, detail="User already exists")
+    return {"id": new_user.id, "mobile_number": new_user.mobile_number, "role": new_user.role}
+
+@router.post("/login", response_model=Token)
+async def login_user(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Вход с помощью SMS-кода (async).
+    """
+    user = await AsyncUserCRUD.get_login(db, request.mobile_number)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if not verify_sms_code(user.mobile_number, request.sms_code):
+        raise HTTPException(status_code=403, detail="Invalid SMS code")
+
+    token = create_access_token({"sub": user.mobile_number, "role": user.role})
+    return {"access_token": token, "token_type": "bearer"}
+
+# No database access, the sync handler is reused as is
+router.add_api_route("/send-sms", send_sms, methods=["POST"], response_model=dict)
+router.add_api_route("/hashing/stats", hashing_stats, methods=["GET"], response_model=dict)
+router.add_api_route("/token-cache/stats", token_cache_stats, methods=["GET"], response_model=dict)
+
+@router.get("/me", response_model=CurrentUser)
+async def read_current_user(current_user: CurrentUser = Depends(get_current_user_async)):
+    """
+    Текущий пользователь по Bearer-токену (async).
+    """
+    return current_user
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_async_db
+from app.models.executor import Executor
+from app.routes.executors import REGISTERED, ExecutorCreate, ExecutorRegistered, load_index_stats, routing_cache_stats
+from app.utils.routing_cache import routing_cache
+from app.utils.security import hash_password_async
+from app.utils.inserts import insert_rows_if_absent
+from app.utils.stats import executors_registered
+
+router = APIRouter()
+
+@router.post("/executors/register", response_model=ExecutorRegistered)
+async def register_executor(executor: ExecutorCreate, db: AsyncSession = Depends(get_async_db)):
+    hashed_password = await hash_password_async(executor.password)
+    try:
+        conn = await db.connection()
+        new_executor = (await conn.execute(insert_rows_if_absent(db, Executor, ["mobile_number"], REGISTERED), {
+            "mobile_number": executor.mobile_number,
+            "name": executor.name,
+            "email": executor.email,
+            "company_name": executor.company_name,
+            "hashed_password": hashed_password,
+            "role": executor.role,
+            "group": executor.group,
+        })).first()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
+    if new_executor is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Mobile number already registered")
+    registered = new_executor._asdict()
+    await db.execute(executors_registered(db, [registered]))
+    await db.commit()
+    # Roster for this category changed
+    routing_cache.invalidate(registered["role"])
+    return registered
+
+router.add_api_route("/executors/routing-cache/stats", routing_cache_stats, methods=["GET"], response_model=dict)
+router.add_api_route("/executors/load-index/stats", load_index_stats, methods=["GET"], response_model=dict)
@@ -0,0 +1,242 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.models.database import get_async_db, get_async_read_db, async_read_session, read_from_primary
+from app.models.request import Request
+from app.routes.requests import (
+    RequestCreate, RequestCreated, RequestClosed, RequestFields, RequestPage, SearchPage, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    STREAM_MEDIA_TYPES, search_query, search_page, stream_query, encode_stream_batch, catch_up_query, subscription_stats,
+    CreatedWindow, NO_WINDOW, created_window, listing_filters, listing_etag, listing_version_query, request_etag,
+    request_version_query,
+    DETAIL_FIELDS, LIST_FIELDS, parse_fields, projection_query, project_rows,
+)
+from app.utils.assignment import assign_executors, close_assignments, executor_load_index
+from app.utils.outbox import request_created_event
+from app.utils.etag import etag_matches, not_modified
+from app.utils.inserts import violation
+from app.utils.push import SSE_HEADERS, request_event, request_hub, sse_stream
+from app.utils.stats import request_created, request_status_changed
+from typing import List, Literal, Optional, Tuple
+
+router = APIRouter()
+
+
+@router.post("/requests", response_model=RequestCreated)
+async def create_request(request_data: RequestCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new request and assign it to the correct executor group based on category (async).
+    """
+    new_request = Request(
+        title=request_data.title,
+        description=request_data.description,
+        category=request_data.category,
+        user_id=request_data.user_id,
+    )
+    db.add(new_request)
+    try:
+        await db.flush()
+    except IntegrityError as error:
+        await db.rollback()
+        if violation(error) == "foreign_key":
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
+
+    # The load index works on a sync Session, run_sync hands it one bound to this connection
+    assigned = await db.run_sync(assign_executors, new_request)
+    if not assigned:
+        raise HTTPException(status_code=404, detail="No executors found for the specified category")
+
+    db.add(request_created_event(new_request, [executor["id"] for executor in assigned]))
+    event = request_event(new_request.id, new_request.title, new_request.category, new_request.user_id, assigned)
+    notification = request_hub.notification(event)
+    try:
+        if notification is not None:
+            await db.execute(notification)
+        await db.execute(request_created(db, new_request))
+        await db.commit()
+    except Exception as error:
+        executor_load_index.release(request_data.category, [executor["id"] for executor in assigned])
+        if isinstance(error, IntegrityError) and violation(error) == "foreign_key":
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Assigned executor no longer exists, retry")
+        raise
+
+    request_hub.publish(event)
+    return {
+        "request_id": new_request.id,
+        "title": new_request.title,
+        "category": new_request.category,
+        "assigned_executors": assigned,
+    }
+
+
+@router.get("/requests/search", response_model=SearchPage)
+async def search_requests(
+    q: str = Query(..., min_length=1, description="Search terms (web search syntax)"),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    window: CreatedWindow = Depends(created_window),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Full-text search over request titles and descriptions, best matches first (async).
+    """
+    rows = (await db.execute(search_query(q, category, status, cursor, limit, window))).all()
+    return search_page(rows, limit)
+
+
+async def _stream_requests(category: Optional[str], status: Optional[str], fields: Tuple[str, ...], fmt: str,
+                           primary: bool, window: CreatedWindow = NO_WINDOW):
+    async with await async_read_session(primary) as db:
+        if fmt == "json":
+            yield b"["
+        first = True
+        result = await db.stream(stream_query(category, status, fields, window))
+        async for rows in result.partitions():
+            yield encode_stream_batch(await db.run_sync(project_rows, rows, fields), fmt, first)
+            first = False
+        if fmt == "json":
+            yield b"]"
+
+
+@router.get("/requests/stream")
+async def stream_requests(
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    format: Literal["ndjson", "json"] = "ndjson",
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    window: CreatedWindow = Depends(created_window),
+    primary: bool = Depends(read_from_primary),
+):
+    """
+    Stream all matching requests as NDJSON (default) or one JSON array (async).
+    """
+    selected = parse_fields(fields, DETAIL_FIELDS, summary)
+    return StreamingResponse(
+        _stream_requests(category, status, selected, format, primary, window), media_type=STREAM_MEDIA_TYPES[format]
+    )
+
+
+@router.get("/requests/subscribe")
+async def subscribe_requests(
+    role: str = Query(..., description="Executor role, i.e. the request category"),
+    group: Optional[str] = Query(None, description="Only requests assigned to executors of this group"),
+    after: Optional[int] = Query(None, description="Resume after this request ID, for clients that cannot send Last-Event-ID"),
+    last_event_id: Optional[int] = Header(None),
+    primary: bool = Depends(read_from_primary),
+):
+    """
+    Server-sent events with every new request of `role` (and `group`) (async).
+    """
+    if request_hub.full():
+        raise HTTPException(status_code=503, detail="Too many subscriptions, try again later")
+
+    async def catch_up(after_id: int) -> List[dict]:
+        async with await async_read_session(primary) as db:
+            rows = (await db.execute(catch_up_query(role, after_id))).all()
+            return await db.run_sync(project_rows, rows, LIST_FIELDS)
+
+    resume = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        sse_stream(request_hub, role, group, catch_up, resume), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+router.add_api_route("/requests/subscriptions/stats", subscription_stats, methods=["GET"], response_model=dict)
+
+
+@router.post("/requests/{request_id}/close", response_model=RequestClosed)
+async def close_request(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Close a request and release its executors' load (async).
+    """
+    request = await db.scalar(select(Request).where(Request.id == request_id))
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if request.status == "closed":
+        return {"id": request.id, "status": request.status, "released_executors": 0}
+
+    previous_status = request.status
+    request.status = "closed"
+    request.closed_at = func.now()
+    executor_ids = await db.run_sync(close_assignments, request.id)
+    try:
+        await db.execute(request_status_changed(db, request.category, request.budget, previous_status, "closed"))
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Request was modified concurrently, retry")
+    executor_load_index.release(request.category, executor_ids)
+    return {"id": request.id, "status": request.status, "released_executors": len(executor_ids)}
+
+
+@router.get("/requests/{request_id}", response_model=RequestFields, response_model_exclude_unset=True)
+async def get_request(
+    request_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Fetch a request by ID and include assigned executor information (async).
+    """
+    selected = parse_fields(fields, DETAIL_FIELDS, summary)
+    versions = (await db.execute(request_version_query(request_id))).first()
+    if not versions:
+        raise HTTPException(status_code=404, detail="Request not found")
+    etag = request_etag(request_id, versions, selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    row = (await db.execute(projection_query(selected).where(Request.id == request_id))).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    response.headers["ETag"] = etag
+    return (await db.run_sync(project_rows, [row], selected))[0]
+
+
+@router.get("/requests", response_model=RequestPage, response_model_exclude_unset=True)
+async def list_requests(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="ID of the last request from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, description is left out by default"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    window: CreatedWindow = Depends(created_window),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    List requests page by page (keyset pagination on ID) with their assigned executors (async).
+    """
+    selected = parse_fields(fields, LIST_FIELDS, summary)
+    versions = (await db.execute(listing_version_query(cursor, limit, category, status, window))).all()
+    etag = listing_etag(limit, selected, versions)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    rows = (await db.execute(
+        projection_query(selected)
+        .where(*listing_filters(cursor, category, status, window))
+        .order_by(Request.id)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response.headers["ETag"] = etag
+    return {
+        "items": await db.run_sync(project_rows, rows, selected),
+        "next_cursor": rows[-1].id if has_more else None,
+    }
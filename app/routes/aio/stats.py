@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_async_db, get_async_read_db
+from app.utils.auth import CurrentUser, get_admin_user_async
+from app.utils.stats import read_stats, rebuild_stats, verify_stats
+
+router = APIRouter()
+
+
+@router.get("", response_model=dict)
+async def dashboard_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Requests by category and status with budget totals, executors by role and group, from the counters (async).
+    """
+    return await db.run_sync(read_stats)
+
+
+@router.get("/verify", response_model=dict)
+async def verify_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_admin_user_async),
+):
+    """
+    Recount everything and report counters that drifted from the tables (async).
+    """
+    return await db.run_sync(verify_stats)
+
+
+@router.post("/rebuild", response_model=dict)
+async def rebuild_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_admin_user_async),
+):
+    """
+    Replace the counters with a full recount (async).
+    """
+    await db.run_sync(rebuild_stats)
+    await db.commit()
+    return await db.run_sync(read_stats)
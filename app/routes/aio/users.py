@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_async_db
+from app.models.user import User
+from app.routes.users import REGISTERED, UserCreate, UserRegistered, valid_roles
+from app.utils.security import hash_password_async
+from app.utils.inserts import insert_rows_if_absent
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/users/register", response_model=UserRegistered)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Endpoint to register a new user (async).
+    """
+    logger.info(f"Attempting to register user: {user.mobile_number}")
+
+    try:
+        if user.role not in valid_roles:
+            logger.error(f"Invalid role provided: {user.role}")
+            raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}.")
+
+        hashed_password = None
+        if user.password:
+            hashed_password = await hash_password_async(user.password)
+            logger.info("Password hashed successfully.")
+
+        conn = await db.connection()
+        new_user = (await conn.execute(insert_rows_if_absent(db, User, ["mobile_number"], REGISTERED), {
+            "mobile_number": user.mobile_number,
+            "name": user.name,
+            "email": user.email,
+            "company_name": user.company_name,
+            "hashed_password": hashed_password,
+            "role": user.role,
+            "location": user.location,
+        })).first()
+        if new_user is None:
+            logger.error(f"User with mobile number {user.mobile_number} already exists.")
+            raise HTTPException(status_code=400, detail="Mobile number already registered")
+        await db.commit()
+
+        logger.info(f"User {new_user.mobile_number} registered successfully with ID {new_user.id}.")
+        return new_user._asdict()
+
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
+    except Exception as e:
+        logger.error(f"An error occurred while registering user: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="An error occurred during registration")
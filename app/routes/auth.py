@@ -4,7 +4,10 @@ from pydantic import BaseModel
 from typing import Optional
 from app.models.database import get_db
 from app.crud.user_crud import UserCRUD
+from app.routes.users import UserRegistered
 from app.utils.security import create_access_token, verify_sms_code, send_sms_code, hash_password
+from app.utils.hashing import password_hasher
+from app.utils.auth import CurrentUser, get_current_user, token_verifier
 
 
 router = APIRouter()
@@ -26,17 +29,16 @@ class LoginRequest(BaseModel):
     mobile_number: str
     sms_code: str
 
-@router.post("/register", response_model=dict)
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+@router.post("/register", response_model=UserRegistered)
 def register_user(user: UserRegister, db: Session = Depends(get_db)):
     """
     Регистрация нового пользователя.
-    Проверяет наличие пользователя и регистрирует нового при отсутствии.
+    Проверка существования и вставка выполняются одним INSERT ... ON CONFLICT.
     """
-    # Проверяем, существует ли пользователь
-    existing_user = UserCRUD.get_user(db, mobile_number=user.mobile_number)
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User already exists")
-    
     # Validate the role
     if user.role not in ALLOWED_ROLES:
         raise HTTPException(status_code=400, detail=f"Invalid role. Allowed roles: {ALLOWED_ROLES}")
@@ -47,8 +49,8 @@ def register_user(user: UserRegister, db: Session = Depends(get_db)):
     # Handle admin approval
     approved_role = user.role if user.role != "admin" else "pending_admin"
 
-    # Регистрируем нового пользователя
-    new_user = UserCRUD.create_user(
+    # Регистрируем нового пользователя, None - номер уже зарегистрирован
+    new_user = UserCRUD.insert_user(
         db=db,
         mobile_number=user.mobile_number,
         name=user.name,
@@ -58,16 +60,18 @@ def register_user(user: UserRegister, db: Session = Depends(get_db)):
         role=approved_role,
         location=user.location,
     )
+    if new_user is None:
+        raise HTTPException(status_code=400, detail="User already exists")
     return {"id": new_user.id, "mobile_number": new_user.mobile_number, "role": new_user.role}
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=Token)
 def login_user(request: LoginRequest, db: Session = Depends(get_db)):
     """
     Вход с помощью SMS-кода.
     Проверяет код и возвращает JWT токен.
     """
     # Ищем пользователя по номеру телефона
-    user = UserCRUD.get_user(db, mobile_number=request.mobile_number)
+    user = UserCRUD.get_login(db, request.mobile_number)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -88,3 +92,24 @@ def send_sms(mobile_number: str):
     if not send_sms_code(mobile_number):
         raise HTTPException(status_code=500, detail="Failed to send SMS")
     return {"detail": "SMS sent successfully"}
+
+@router.get("/hashing/stats", response_model=dict)
+def hashing_stats():
+    """
+    Метрики пула хеширования паролей: глубина очереди и задержка.
+    """
+    return password_hasher.stats()
+
+@router.get("/me", response_model=CurrentUser)
+def read_current_user(current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Текущий пользователь по Bearer-токену.
+    """
+    return current_user
+
+@router.get("/token-cache/stats", response_model=dict)
+def token_cache_stats():
+    """
+    Счетчики проверки токенов: декодирования, попадания в кэш, запросы к БД.
+    """
+    return token_verifier.stats()
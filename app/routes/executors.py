@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.database import get_db
 from app.models.executor import Executor
 from pydantic import BaseModel
-from bcrypt import hashpw, gensalt
+from app.utils.routing_cache import routing_cache
+from app.utils.assignment import executor_load_index
+from app.utils.security import hash_password
+from app.utils.inserts import insert_rows_if_absent
+from app.utils.stats import executors_registered
 
 router = APIRouter()
 
@@ -16,21 +21,51 @@ class ExecutorCreate(BaseModel):
     role: str  # Mandatory field for executor roles
     group: str   # Mandatory group for executor
 
-@router.post("/executors/register")
+class ExecutorRegistered(BaseModel):
+    id: int
+    mobile_number: str
+    role: str
+    group: str | None = None
+
+# Columns returned by the registration insert
+REGISTERED = ["id", "mobile_number", "role", "group"]
+
+@router.post("/executors/register", response_model=ExecutorRegistered)
 def register_executor(executor: ExecutorCreate, db: Session = Depends(get_db)):
-    if db.query(Executor).filter(Executor.mobile_number == executor.mobile_number).first():
+    hashed_password = hash_password(executor.password)
+    # Check and insert in one statement: no SELECT first, no race between two registrations.
+    # Prebuilt statement on the session's connection, the response only needs a few columns
+    try:
+        new_executor = db.connection().execute(insert_rows_if_absent(db, Executor, ["mobile_number"], REGISTERED), {
+            "mobile_number": executor.mobile_number,
+            "name": executor.name,
+            "email": executor.email,
+            "company_name": executor.company_name,
+            "hashed_password": hashed_password,
+            "role": executor.role,
+            "group": executor.group,
+        }).first()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
+    if new_executor is None:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Mobile number already registered")
-    hashed_password = hashpw(executor.password.encode('utf-8'), gensalt()).decode('utf-8')
-    new_executor = Executor(
-        mobile_number=executor.mobile_number,
-        name=executor.name,
-        email=executor.email,
-        company_name=executor.company_name,
-        hashed_password=hashed_password,
-        role=executor.role,
-        group=executor.group
-    )
-    db.add(new_executor)
+    registered = new_executor._asdict()
+    db.execute(executors_registered(db, [registered]))
     db.commit()
-    db.refresh(new_executor)
-    return {"id": new_executor.id, "mobile_number": new_executor.mobile_number, "role": new_executor.role, "group": new_executor.group}
+    # Roster for this category changed
+    routing_cache.invalidate(registered["role"])
+    return registered
+
+
+@router.get("/executors/routing-cache/stats", response_model=dict)
+def routing_cache_stats():
+    """Hit/miss statistics of the category -> executors routing cache."""
+    return routing_cache.stats()
+
+
+@router.get("/executors/load-index/stats", response_model=dict)
+def load_index_stats():
+    """Roles and open load tracked by the executor assignment index."""
+    return executor_load_index.stats()
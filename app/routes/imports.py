@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Depends, File, Query, UploadFile
+from sqlalchemy.orm import Session
+from app.models.database import get_db
+from app.utils.auth import CurrentUser, get_admin_user
+from app.utils.bulk_import import IMPORT_TARGETS, guess_format, import_rows, read_rows
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.post("/{target}", response_model=dict)
+def bulk_import(
+    target: str,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_admin_user),
+):
+    """
+    Bulk import users or executors from a CSV (with header) or NDJSON file.
+    Rows are processed in chunks; returns counts and a per-row error report.
+    Admins only.
+    """
+    if target not in IMPORT_TARGETS:
+        raise HTTPException(status_code=404, detail=f"Unknown import target. Choose from {sorted(IMPORT_TARGETS)}")
+
+    file_format = file_format or guess_format(file.filename)
+    try:
+        return import_rows(db, target, read_rows(file.file, file_format))
+    except ValueError as e:
+        # Unsupported format or a malformed line; chunks before it are already committed
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,14 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.orm.exc import StaleDataError
+from app.models.database import get_db, get_read_db, read_from_primary, read_session
+from app.models.assignment import Assignment
+from app.models.executor import Executor
 from app.models.request import Request  # Import Request model
-from app.models.executor import Executor  # Import Executor model
 from app.models.user import User  # Optional, if users create requests
+from app.utils.assignment import assign_executors, assigned_executors, close_assignments, executor_load_index
+from app.utils.outbox import request_created_event
+from app.utils.etag import digest_etag, etag_matches, not_modified
+from app.utils.inserts import violation
+from app.utils.push import PUSH_CATCH_UP_LIMIT, SSE_HEADERS, push_listener, request_event, request_hub, sse_stream
+from app.utils.stats import request_created, request_status_changed
 from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Tuple
+import orjson
 
 router = APIRouter()
 
+# Page size limits for the listing endpoint
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Text search configuration used by the search_vector generated column
+SEARCH_CONFIG = "simple"
+
+# Rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Columns a client can pick with ?fields=; "assigned_executors" is expanded from the assignments
+REQUEST_COLUMNS = {
+    "id": Request.id,
+    "title": Request.title,
+    "description": Request.description,
+    "category": Request.category,
+    "status": Request.status,
+    "budget": Request.budget,
+    "user_id": Request.user_id,
+    "created_at": Request.created_at,
+    "closed_at": Request.closed_at,
+}
+REQUEST_FIELDS = (*REQUEST_COLUMNS, "assigned_executors")
+DETAIL_FIELDS = ("id", "title", "description", "category", "user_id", "assigned_executors")
+# description is unbounded text, list views get it only when they ask for it
+LIST_FIELDS = ("id", "title", "category", "user_id", "assigned_executors")
+
 # Request creation schema
 class RequestCreate(BaseModel):
     title: str
@@ -16,19 +57,59 @@ class RequestCreate(BaseModel):
     category: str  # To determine executor group (e.g., "IT", "HR", etc.)
     user_id: Optional[int] = None  # Optional if users submit requests
 
+# Response schemas
+class ExecutorInfo(BaseModel):
+    id: int
+    name: Optional[str] = None
+    group: Optional[str] = None
+
+class RequestCreated(BaseModel):
+    request_id: int
+    title: str
+    category: str
+    assigned_executors: List[ExecutorInfo]
+
+class RequestFields(BaseModel):
+    """Sparse request: only the fields picked with ?fields= are set and serialized."""
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    status: Optional[str] = None
+    budget: Optional[int] = None
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+    assigned_executors: Optional[List[ExecutorInfo]] = None
+
+class RequestClosed(BaseModel):
+    id: int
+    status: str
+    released_executors: int
+
+class RequestPage(BaseModel):
+    items: List[RequestFields]
+    next_cursor: Optional[int] = None
+
+class SearchResult(BaseModel):
+    id: int
+    title: str
+    category: str
+    status: Optional[str] = None
+    user_id: Optional[int] = None
+    rank: float
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
+
 
-@router.post("/requests", response_model=dict)
+@router.post("/requests", response_model=RequestCreated)
 def create_request(request_data: RequestCreate, db: Session = Depends(get_db)):
     """
     Create a new request and assign it to the correct executor group based on category.
     """
-    # Validate user existence (if provided)
-    if request_data.user_id:
-        user = db.query(User).filter(User.id == request_data.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-    # Create the new request
+    # Create the new request; an unknown user_id fails on the foreign key instead of a lookup first
     new_request = Request(
         title=request_data.title,
         description=request_data.description,
@@ -36,67 +117,444 @@ def create_request(request_data: RequestCreate, db: Session = Depends(get_db)):
         user_id=request_data.user_id,
     )
     db.add(new_request)
-    db.commit()
-    db.refresh(new_request)
+    try:
+        # INSERT ... RETURNING id and server defaults, no refresh needed afterwards
+        db.flush()
+    except IntegrityError as error:
+        db.rollback()
+        if violation(error) == "foreign_key":
+            raise HTTPException(status_code=404, detail="User not found")
+        raise
+    request_id = new_request.id
 
-    # Assign executors to the request based on their roles
-    executors = db.query(Executor).filter(Executor.role == request_data.category).all()
-    if not executors:
+    # Persist the least-loaded executors of the category
+    assigned = assign_executors(db, new_request)
+    if not assigned:
         raise HTTPException(status_code=404, detail="No executors found for the specified category")
 
-    # Notify executors or handle logic for executor group assignment
-    assigned_executors = [{"id": executor.id, "name": executor.name} for executor in executors]
+    # Event is committed atomically with the request, the outbox relay publishes it
+    db.add(request_created_event(new_request, [executor["id"] for executor in assigned]))
+    event = request_event(request_id, request_data.title, request_data.category, request_data.user_id, assigned)
+    notification = request_hub.notification(event)
+    try:
+        if notification is not None:
+            # Delivered to the subscribers of every worker on commit
+            db.execute(notification)
+        # Dashboard counters last: their row locks are held only until the commit right after
+        db.execute(request_created(db, new_request))
+        db.commit()
+    except Exception as error:
+        executor_load_index.release(request_data.category, [executor["id"] for executor in assigned])
+        if isinstance(error, IntegrityError) and violation(error) == "foreign_key":
+            # An assigned executor was deleted meanwhile
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Assigned executor no longer exists, retry")
+        raise
+
+    # Executors are notified asynchronously via the request-created event,
+    # subscribers get it pushed right away
+    request_hub.publish(event)
 
     # Return the created request with assigned executors
     return {
-        "request_id": new_request.id,
-        "title": new_request.title,
-        "category": new_request.category,
-        "assigned_executors": assigned_executors,
+        "request_id": request_id,
+        "title": request_data.title,
+        "category": request_data.category,
+        "assigned_executors": assigned,
+    }
+
+
+# (created_from, created_to) of ?created_from=&created_to=, naive UTC like the columns
+CreatedWindow = Tuple[Optional[datetime], Optional[datetime]]
+NO_WINDOW: CreatedWindow = (None, None)
+
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def created_window(
+    created_from: Optional[datetime] = Query(None, description="Only requests created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only requests created before this time"),
+) -> CreatedWindow:
+    """Creation time window; on Postgres the monthly partitions outside of it are not scanned."""
+    window = (_naive_utc(created_from), _naive_utc(created_to))
+    if window[0] and window[1] and window[0] >= window[1]:
+        raise HTTPException(status_code=400, detail="created_from must be before created_to")
+    return window
+
+
+def window_filters(window: CreatedWindow) -> list:
+    created_from, created_to = window
+    conditions = []
+    if created_from:
+        conditions.append(Request.created_at >= created_from)
+    if created_to:
+        conditions.append(Request.created_at < created_to)
+    return conditions
+
+
+def search_query(
+    q: str,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    window: CreatedWindow = NO_WINDOW,
+):
+    """
+    Ranked full-text search over title + description (GIN on search_vector).
+    Keyset pagination on (rank, id), both descending; cursor is "rank:id".
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    search_vector = literal_column("requests.search_vector")
+    rank = func.ts_rank(search_vector, tsquery).label("rank")
+
+    query = select(
+        Request.id, Request.title, Request.category, Request.status, Request.user_id, rank
+    ).where(search_vector.op("@@")(tsquery), *window_filters(window))
+    if category:
+        query = query.where(Request.category == category)
+    if status:
+        query = query.where(Request.status == status)
+    if cursor:
+        try:
+            last_rank, last_id = cursor.split(":")
+            last_rank, last_id = float(last_rank), int(last_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(func.ts_rank(search_vector, tsquery), Request.id) < tuple_(last_rank, last_id))
+
+    return query.order_by(rank.desc(), Request.id.desc()).limit(limit + 1)
+
+
+def search_page(rows, limit: int) -> dict:
+    """Build the search response from up to limit + 1 rows."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "title": row.title,
+                "category": row.category,
+                "status": row.status,
+                "user_id": row.user_id,
+                "rank": row.rank,
+            }
+            for row in rows
+        ],
+        "next_cursor": f"{rows[-1].rank!r}:{rows[-1].id}" if has_more else None,
     }
 
 
-@router.get("/requests/{request_id}", response_model=dict)
-def get_request(request_id: int, db: Session = Depends(get_db)):
+@router.get("/requests/search", response_model=SearchPage)
+def search_requests(
+    q: str = Query(..., min_length=1, description="Search terms (web search syntax)"),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    window: CreatedWindow = Depends(created_window),
+    db: Session = Depends(get_read_db),
+):
     """
-    Fetch a request by ID and include assigned executor information.
+    Full-text search over request titles and descriptions, best matches first.
+    """
+    rows = db.execute(search_query(q, category, status, cursor, limit, window)).all()
+    return search_page(rows, limit)
+
+
+def listing_filters(cursor: Optional[int] = None, category: Optional[str] = None, status: Optional[str] = None,
+                    window: CreatedWindow = NO_WINDOW) -> list:
+    """WHERE clauses of the listing, shared by the page query and its version lookup."""
+    conditions = window_filters(window)
+    if category:
+        conditions.append(Request.category == category)
+    if status:
+        conditions.append(Request.status == status)
+    if cursor is not None:
+        conditions.append(Request.id > cursor)
+    return conditions
+
+
+def parse_fields(fields: Optional[str], default: Tuple[str, ...], summary: bool = False) -> Tuple[str, ...]:
+    """?fields=title,category -> ("title", "category"); summary drops the executor expansion."""
+    if fields:
+        selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in selected if field not in REQUEST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}. Choose from {list(REQUEST_FIELDS)}")
+    else:
+        selected = default
+    if summary:
+        selected = tuple(field for field in selected if field != "assigned_executors")
+    return selected
+
+
+def projection_query(fields: Tuple[str, ...]):
+    """SELECT of only the columns behind `fields`; id is always read (cursor, executor lookup)."""
+    columns = [Request.id] + [REQUEST_COLUMNS[field] for field in fields if field in REQUEST_COLUMNS and field != "id"]
+    return select(*columns)
+
+
+def project_rows(db: Session, rows, fields: Tuple[str, ...]) -> List[dict]:
+    """Response dicts with exactly `fields`; executors are looked up only when asked for."""
+    executors = assigned_executors(db, [row.id for row in rows]) if "assigned_executors" in fields else None
+    columns = [field for field in fields if field in REQUEST_COLUMNS]
+    items = []
+    for row in rows:
+        item = {field: getattr(row, field) for field in columns}
+        if executors is not None:
+            item["assigned_executors"] = executors[row.id]
+        items.append(item)
+    return items
+
+
+def stream_query(category: Optional[str] = None, status: Optional[str] = None, fields: Tuple[str, ...] = DETAIL_FIELDS,
+                 window: CreatedWindow = NO_WINDOW):
+    """Listing query for streaming, read through a server-side cursor."""
+    return (
+        projection_query(fields)
+        .where(*listing_filters(None, category, status, window))
+        .order_by(Request.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+
+def encode_stream_batch(items: List[dict], fmt: str, first: bool) -> bytes:
+    """Serialize one cursor batch as NDJSON lines or as a JSON array fragment."""
+    encoded = [orjson.dumps(item) for item in items]
+    if fmt == "ndjson":
+        return b"\n".join(encoded) + b"\n"
+    return (b"" if first else b",") + b",".join(encoded)
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def _stream_requests(category: Optional[str], status: Optional[str], fields: Tuple[str, ...], fmt: str, primary: bool,
+                     window: CreatedWindow = NO_WINDOW):
+    # Own session: the generator outlives the request dependency scope
+    db = read_session(primary)
+    try:
+        if fmt == "json":
+            yield b"["
+        first = True
+        for rows in db.execute(stream_query(category, status, fields, window)).partitions():
+            yield encode_stream_batch(project_rows(db, rows, fields), fmt, first)
+            first = False
+        if fmt == "json":
+            yield b"]"
+    finally:
+        db.close()
+
+
+@router.get("/requests/stream")
+def stream_requests(
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    format: Literal["ndjson", "json"] = "ndjson",
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    window: CreatedWindow = Depends(created_window),
+    primary: bool = Depends(read_from_primary),
+):
+    """
+    Stream all matching requests as NDJSON (default) or one JSON array,
+    serialized batch by batch from a server-side cursor.
+    """
+    selected = parse_fields(fields, DETAIL_FIELDS, summary)
+    return StreamingResponse(
+        _stream_requests(category, status, selected, format, primary, window), media_type=STREAM_MEDIA_TYPES[format]
+    )
+
+
+def catch_up_query(role: str, after_id: int):
+    """The newest requests of a role created after `after_id` (newest first), for resuming subscriptions."""
+    return (
+        projection_query(LIST_FIELDS)
+        .where(Request.category == role, Request.id > after_id)
+        .order_by(Request.id.desc())
+        .limit(PUSH_CATCH_UP_LIMIT)
+    )
+
+
+def _catch_up(role: str, after_id: int, primary: bool) -> List[dict]:
+    db = read_session(primary)
+    try:
+        return project_rows(db, db.execute(catch_up_query(role, after_id)).all(), LIST_FIELDS)
+    finally:
+        db.close()
+
+
+@router.get("/requests/subscribe")
+async def subscribe_requests(
+    role: str = Query(..., description="Executor role, i.e. the request category"),
+    group: Optional[str] = Query(None, description="Only requests assigned to executors of this group"),
+    after: Optional[int] = Query(None, description="Resume after this request ID, for clients that cannot send Last-Event-ID"),
+    last_event_id: Optional[int] = Header(None),
+    primary: bool = Depends(read_from_primary),
+):
+    """
+    Server-sent events: every new request of `role` (and `group`) as it is
+    created, instead of polling the listing. Reconnects with Last-Event-ID
+    first receive the requests they missed, at most PUSH_CATCH_UP_LIMIT.
+    """
+    if request_hub.full():
+        raise HTTPException(status_code=503, detail="Too many subscriptions, try again later")
+
+    async def catch_up(after_id: int) -> List[dict]:
+        return await run_in_threadpool(_catch_up, role, after_id, primary)
+
+    resume = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        sse_stream(request_hub, role, group, catch_up, resume), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.get("/requests/subscriptions/stats", response_model=dict)
+def subscription_stats():
+    """Open subscriptions and fan-out counters of this worker."""
+    return {**request_hub.stats(), "listener": push_listener.stats()}
+
+
+@router.post("/requests/{request_id}/close", response_model=RequestClosed)
+def close_request(request_id: int, db: Session = Depends(get_db)):
+    """
+    Close a request and release its executors' load.
     """
     request = db.query(Request).filter(Request.id == request_id).first()
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
+    if request.status == "closed":
+        return {"id": request.id, "status": request.status, "released_executors": 0}
 
-    # Fetch executors assigned to this category
-    executors = db.query(Executor).filter(Executor.role == request.category).all()
-    executor_info = [{"id": executor.id, "name": executor.name} for executor in executors]
+    previous_status = request.status
+    request.status = "closed"
+    request.closed_at = func.now()
+    executor_ids = close_assignments(db, request.id)
+    try:
+        db.execute(request_status_changed(db, request.category, request.budget, previous_status, "closed"))
+        db.commit()
+    except StaleDataError:
+        # Someone else updated the request since we read it (version mismatch)
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Request was modified concurrently, retry")
+    executor_load_index.release(request.category, executor_ids)
+    return {"id": request.id, "status": request.status, "released_executors": len(executor_ids)}
+
+
+def request_version_query(request_id: int):
+    """Versions behind a request response (the request and its executors), no row loading."""
+    return (
+        select(Request.version, func.coalesce(func.sum(Executor.version), 0))
+        .outerjoin(Assignment, Assignment.request_id == Request.id)
+        .outerjoin(Executor, Executor.id == Assignment.executor_id)
+        .where(Request.id == request_id)
+        .group_by(Request.id, Request.version)
+    )
+
+
+def request_etag(request_id: int, versions, fields: Tuple[str, ...] = DETAIL_FIELDS) -> str:
+    # Executor versions only grow, so their sum changes whenever any of them does
+    projection = "" if fields == DETAIL_FIELDS else "." + "+".join(fields)
+    return f'"{request_id}-{versions[0]}-{versions[1]}{projection}"'
+
+
+def listing_version_query(cursor: Optional[int], limit: int, category: Optional[str], status: Optional[str],
+                          window: CreatedWindow = NO_WINDOW):
+    """(id, version, executor versions) of the rows a listing page would return, plus the look-ahead row."""
+    page = (
+        select(Request.id, Request.version)
+        .where(*listing_filters(cursor, category, status, window))
+        .order_by(Request.id)
+        .limit(limit + 1)
+        .subquery()
+    )
+    return (
+        select(page.c.id, page.c.version, func.coalesce(func.sum(Executor.version), 0))
+        .select_from(page)
+        .outerjoin(Assignment, Assignment.request_id == page.c.id)
+        .outerjoin(Executor, Executor.id == Assignment.executor_id)
+        .group_by(page.c.id, page.c.version)
+        .order_by(page.c.id)
+    )
 
-    return {
-        "id": request.id,
-        "title": request.title,
-        "description": request.description,
-        "category": request.category,
-        "user_id": request.user_id,
-        "assigned_executors": executor_info,
-    }
 
+def listing_etag(limit: int, fields: Tuple[str, ...], rows) -> str:
+    # limit decides where the page ends (next_cursor), the rows cover everything else
+    return digest_etag([limit, fields, *(tuple(row) for row in rows)])
 
-@router.get("/requests", response_model=List[dict])
-def list_requests(db: Session = Depends(get_db)):
+
+@router.get("/requests/{request_id}", response_model=RequestFields, response_model_exclude_unset=True)
+def get_request(
+    request_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Fetch a request by ID and include assigned executor information.
+    Answers 304 to If-None-Match with the current ETag without loading the request.
+    """
+    selected = parse_fields(fields, DETAIL_FIELDS, summary)
+    versions = db.execute(request_version_query(request_id)).first()
+    if not versions:
+        raise HTTPException(status_code=404, detail="Request not found")
+    etag = request_etag(request_id, versions, selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    row = db.execute(projection_query(selected).where(Request.id == request_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    response.headers["ETag"] = etag
+    return project_rows(db, [row], selected)[0]
+
+
+@router.get("/requests", response_model=RequestPage, response_model_exclude_unset=True)
+def list_requests(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="ID of the last request from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, description is left out by default"),
+    summary: bool = Query(False, description="Skip the assigned executors"),
+    window: CreatedWindow = Depends(created_window),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
-    List all requests with their assigned executors.
+    List requests page by page (keyset pagination on ID) with their assigned executors.
+    Pass `next_cursor` from the previous response as `cursor` to get the next page.
+    Answers 304 to If-None-Match when no request or executor on the page changed.
+    created_from / created_to restrict the listing to a creation time window.
     """
-    requests = db.query(Request).all()
-    response = []
-    for req in requests:
-        executors = db.query(Executor).filter(Executor.role == req.category).all()
-        executor_info = [{"id": executor.id, "name": executor.name} for executor in executors]
+    selected = parse_fields(fields, LIST_FIELDS, summary)
+    versions = db.execute(listing_version_query(cursor, limit, category, status, window)).all()
+    etag = listing_etag(limit, selected, versions)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
-        response.append({
-            "id": req.id,
-            "title": req.title,
-            "description": req.description,
-            "category": req.category,
-            "user_id": req.user_id,
-            "assigned_executors": executor_info,
-        })
+    # Fetch one extra row to know whether there is a next page
+    rows = db.execute(
+        projection_query(selected)
+        .where(*listing_filters(cursor, category, status, window))
+        .order_by(Request.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-    return response
+    response.headers["ETag"] = etag
+    return {
+        "items": project_rows(db, rows, selected),
+        "next_cursor": rows[-1].id if has_more else None,
+    }
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.models.database import get_db, get_read_db
+from app.utils.auth import CurrentUser, get_admin_user
+from app.utils.stats import read_stats, rebuild_stats, verify_stats
+
+router = APIRouter()
+
+
+@router.get("", response_model=dict)
+def dashboard_stats(db: Session = Depends(get_read_db)):
+    """
+    Requests by category and status with budget totals, executors by role and
+    group. Read from counters kept up to date by the write endpoints, so the
+    cost does not grow with the number of requests.
+    """
+    return read_stats(db)
+
+
+@router.get("/verify", response_model=dict)
+def verify_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_admin_user),
+):
+    """
+    Recount everything and report counters that drifted from the tables.
+    Scans requests and executors: an ops check, not a dashboard query. Admins only.
+    """
+    return verify_stats(db)
+
+
+@router.post("/rebuild", response_model=dict)
+def rebuild_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_admin_user),
+):
+    """
+    Replace the counters with a full recount, e.g. after drift or a bulk load
+    that bypassed the API. Writers that touch the counters wait until it is done.
+    Admins only.
+    """
+    rebuild_stats(db)
+    db.commit()
+    return read_stats(db)
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.database import get_db
 from app.models.user import User
 from pydantic import BaseModel
-from bcrypt import hashpw, gensalt
+from app.utils.security import hash_password
+from app.utils.inserts import insert_rows_if_absent
 import logging
 
 
@@ -26,7 +28,15 @@ class UserCreate(BaseModel):
     role: str | None = "client"  # Default role is "client"
     location: str | None = None
 
-@router.post("/users/register", response_model=dict)
+class UserRegistered(BaseModel):
+    id: int
+    mobile_number: str
+    role: str
+
+# Columns returned by the registration insert
+REGISTERED = ["id", "mobile_number", "role"]
+
+@router.post("/users/register", response_model=UserRegistered)
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Endpoint to register a new user.
@@ -35,40 +45,43 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     logger.info(f"Attempting to register user: {user.mobile_number}")
     
     try:
-        # Check if the user already exists
-        existing_user = db.query(User).filter(User.mobile_number == user.mobile_number).first()
-        if existing_user:
-            logger.error(f"User with mobile number {user.mobile_number} already exists.")
-            raise HTTPException(status_code=400, detail="Mobile number already registered")
-        
-        # Hash the password if provided
-        hashed_password = None
-        if user.password:
-            hashed_password = hashpw(user.password.encode('utf-8'), gensalt()).decode('utf-8')
-            logger.info("Password hashed successfully.")
-
         # Validate the role
         if user.role not in valid_roles:
             logger.error(f"Invalid role provided: {user.role}")
             raise HTTPException(status_code=400, detail=f"Invalid role. Choose from {valid_roles}.")
 
-        # Create a new user record
-        new_user = User(
-            mobile_number=user.mobile_number,
-            name=user.name,
-            email=user.email,
-            company_name=user.company_name,
-            hashed_password=hashed_password,
-            role=user.role,
-            location=user.location
-        )
-        db.add(new_user)
+        # Hash the password if provided
+        hashed_password = None
+        if user.password:
+            hashed_password = hash_password(user.password)
+            logger.info("Password hashed successfully.")
+
+        # Insert unless the mobile number is taken: check and insert in one statement, no race window.
+        # Prebuilt statement on the session's connection, the response only needs a few columns
+        new_user = db.connection().execute(insert_rows_if_absent(db, User, ["mobile_number"], REGISTERED), {
+            "mobile_number": user.mobile_number,
+            "name": user.name,
+            "email": user.email,
+            "company_name": user.company_name,
+            "hashed_password": hashed_password,
+            "role": user.role,
+            "location": user.location,
+        }).first()
+        if new_user is None:
+            logger.error(f"User with mobile number {user.mobile_number} already exists.")
+            raise HTTPException(status_code=400, detail="Mobile number already registered")
+        registered = new_user._asdict()
         db.commit()
-        db.refresh(new_user)
 
-        logger.info(f"User {new_user.mobile_number} registered successfully with ID {new_user.id}.")
-        return {"id": new_user.id, "mobile_number": new_user.mobile_number, "role": new_user.role}
+        logger.info(f"User {registered['mobile_number']} registered successfully with ID {registered['id']}.")
+        return registered
     
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
     except Exception as e:
         logger.error(f"An error occurred while registering user: {e}")
         db.rollback()
@@ -0,0 +1,261 @@
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from decouple import config
+from fastapi.responses import ORJSONResponse
+
+
+ADMISSION_ENABLED = config("ADMISSION_ENABLED", default=True, cast=bool)
+# Seconds a request may wait for a slot before it is shed with 503
+ADMISSION_QUEUE_TIMEOUT = config("ADMISSION_QUEUE_TIMEOUT", default=2.0, cast=float)
+ADMISSION_RETRY_AFTER = config("ADMISSION_RETRY_AFTER", default=1, cast=int)
+
+# (concurrency, queue size) per route class. Sync routes share one threadpool
+# (40 threads by default), keep the sum of the limits below it so reads always get a thread.
+ADMISSION_CLASSES = {
+    # bcrypt hashing, bulk imports
+    "auth": (config("ADMISSION_AUTH_CONCURRENCY", default=4, cast=int),
+             config("ADMISSION_AUTH_QUEUE", default=16, cast=int)),
+    "write": (config("ADMISSION_WRITE_CONCURRENCY", default=8, cast=int),
+              config("ADMISSION_WRITE_QUEUE", default=32, cast=int)),
+    "read": (config("ADMISSION_READ_CONCURRENCY", default=16, cast=int),
+             config("ADMISSION_READ_QUEUE", default=64, cast=int)),
+    # Pages, search and streams of requests
+    "list": (config("ADMISSION_LIST_CONCURRENCY", default=4, cast=int),
+             config("ADMISSION_LIST_QUEUE", default=8, cast=int)),
+}
+
+# Token buckets for /auth/send-sms: burst size and refill per minute
+SMS_NUMBER_BURST = config("SMS_NUMBER_BURST", default=3, cast=int)
+SMS_NUMBER_PER_MINUTE = config("SMS_NUMBER_PER_MINUTE", default=1.0, cast=float)
+SMS_IP_BURST = config("SMS_IP_BURST", default=20, cast=int)
+SMS_IP_PER_MINUTE = config("SMS_IP_PER_MINUTE", default=10.0, cast=float)
+# Buckets kept per limiter, least recently used are dropped first
+RATE_LIMIT_MAX_KEYS = config("RATE_LIMIT_MAX_KEYS", default=100000, cast=int)
+# Upper bound of the 429 Retry-After, seconds; *_PER_MINUTE=0 (never refill) answers with it
+RATE_LIMIT_MAX_RETRY_AFTER = config("RATE_LIMIT_MAX_RETRY_AFTER", default=3600, cast=int)
+
+# Monitoring must keep working while the API is saturated; subscriptions stay open
+# for hours and are capped by PUSH_MAX_SUBSCRIBERS instead of a slot
+EXEMPT_PATHS = {
+    "/", "/metrics", "/pool/stats", "/admission/stats", "/idempotency/stats", "/requests/requests/subscribe",
+}
+
+# (methods, path pattern, class), first match wins; everything else is read (GET) or write
+ROUTE_CLASSES = [
+    ({"POST"}, re.compile(r"^/auth/(register|login)$"), "auth"),
+    ({"POST"}, re.compile(r"^/users/users/register$"), "auth"),
+    ({"POST"}, re.compile(r"^/executors/executors/register$"), "auth"),
+    ({"POST"}, re.compile(r"^/imports/"), "auth"),
+    ({"GET"}, re.compile(r"^/requests/requests(/search|/stream)?$"), "list"),
+    # Full recounts of the dashboard counters
+    ({"GET", "POST"}, re.compile(r"^/stats/(verify|rebuild)$"), "list"),
+]
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, None if it is never shed."""
+    if path in EXEMPT_PATHS or method in ("OPTIONS", "HEAD"):
+        return None
+    for methods, pattern, route_class in ROUTE_CLASSES:
+        if method in methods and pattern.match(path):
+            return route_class
+    return "read" if method == "GET" else "write"
+
+
+class ConcurrencyLimiter:
+    """
+    `limit` requests run at once, up to `queue_size` more wait in FIFO order
+    for at most `timeout` seconds. Lives on the event loop, no locking needed.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.wait_max = 0.0
+
+    async def acquire(self) -> bool:
+        """True once a slot is held; False if the request should be shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            # The slot is handed over by release(), `active` is not decremented in between
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            self.rejected_timeout += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over right before the client went away
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+        self.wait_max = max(self.wait_max, time.perf_counter() - started)
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_max": self.wait_max,
+        }
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key (phone number, client IP). Per process: with
+    several workers the effective rate is multiplied by the worker count.
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token; returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        tokens, updated_at = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            wait = 0.0
+            self.allowed += 1
+        else:
+            # A bucket that never refills blocks the key once the burst is spent
+            wait = (1.0 - tokens) / self.rate if self.rate > 0 else float(RATE_LIMIT_MAX_RETRY_AFTER)
+            wait = min(wait, float(RATE_LIMIT_MAX_RETRY_AFTER))
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            # Oldest buckets have refilled the longest, dropping them loses little
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+
+class AdmissionController:
+    def __init__(self, classes: Dict[str, Tuple[int, int]] = ADMISSION_CLASSES, enabled: bool = ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.limiters = {name: ConcurrencyLimiter(name, limit, queue) for name, (limit, queue) in classes.items()}
+        self.sms_per_number = TokenBucketLimiter(SMS_NUMBER_BURST, SMS_NUMBER_PER_MINUTE)
+        self.sms_per_ip = TokenBucketLimiter(SMS_IP_BURST, SMS_IP_PER_MINUTE)
+
+    def check_sms(self, scope) -> float:
+        """Seconds to wait before /auth/send-sms may be called again, 0 if allowed."""
+        client = scope.get("client")
+        wait = self.sms_per_ip.take(client[0] if client else "unknown")
+        number = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("mobile_number")
+        if number:
+            wait = max(wait, self.sms_per_number.take(number[0].strip()))
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "classes": {name: limiter.stats() for name, limiter in self.limiters.items()},
+            "sms_per_number": self.sms_per_number.stats(),
+            "sms_per_ip": self.sms_per_ip.stats(),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware: per route class concurrency limits with bounded wait
+    queues (503 + Retry-After when full or waiting too long) and token buckets
+    on /auth/send-sms (429 + Retry-After). The slot is held until the response
+    body is sent, streams included.
+    """
+
+    def __init__(self, app, controller: "AdmissionController" = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        if method == "POST" and path == "/auth/send-sms":
+            wait = self.controller.check_sms(scope)
+            if wait > 0:
+                response = ORJSONResponse(
+                    {"detail": "Too many SMS requests, try again later"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+                await response(scope, receive, send)
+                return
+
+        route_class = classify(method, path)
+        limiter = self.controller.limiters.get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            response = ORJSONResponse(
+                {"detail": f"Server is busy ({route_class} requests), try again later"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+# Shared instance used by the middleware and /admission/stats
+admission_controller = AdmissionController()
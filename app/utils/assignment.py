@@ -0,0 +1,201 @@
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.assignment import Assignment
+from app.models.executor import Executor
+from app.utils.routing_cache import routing_cache
+
+
+# Executors assigned to each new request
+ASSIGNMENT_SIZE = config("ASSIGNMENT_SIZE", default=3, cast=int)
+# Seconds before a role's loads are re-read from the DB, picks up assignments made by other workers
+ASSIGNMENT_RESYNC_INTERVAL = config("ASSIGNMENT_RESYNC_INTERVAL", default=300.0, cast=float)
+
+# Hot lookups built once with bound parameters, run on the session's connection (rows, no ORM)
+OPEN_LOADS_BY_ROLE = (
+    select(Assignment.executor_id, func.count())
+    .join(Executor, Executor.id == Assignment.executor_id)
+    .where(Executor.role == bindparam("role"), Assignment.closed_at.is_(None))
+    .group_by(Assignment.executor_id)
+)
+ASSIGNED_EXECUTORS = (
+    select(Assignment.request_id, Executor.id, Executor.name, Executor.group)
+    .join(Executor, Executor.id == Assignment.executor_id)
+    .where(Assignment.request_id.in_(bindparam("request_ids", expanding=True)))
+    .order_by(Assignment.request_id, Assignment.id)
+)
+
+
+class _RoleLoads:
+    """
+    Executors of one role ordered by open load, with one min-heap for the role
+    and one per group. Heaps use lazy deletion: an entry (load, id) is live only
+    while it matches `loads[id]`, stale ones are skipped on pop and dropped when
+    the heaps are rebuilt.
+    """
+
+    __slots__ = ("executors", "loads", "heap", "group_heaps", "expires_at")
+
+    def __init__(self, executors: List[dict], loads: Dict[int, int], expires_at: float):
+        self.executors = {executor["id"]: executor for executor in executors}
+        self.loads = {executor_id: loads.get(executor_id, 0) for executor_id in self.executors}
+        self.expires_at = expires_at
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.heap = [(load, executor_id) for executor_id, load in self.loads.items()]
+        self.group_heaps: Dict[Optional[str], List[Tuple[int, int]]] = {}
+        for load, executor_id in self.heap:
+            self.group_heaps.setdefault(self.executors[executor_id]["group"], []).append((load, executor_id))
+        heapq.heapify(self.heap)
+        for heap in self.group_heaps.values():
+            heapq.heapify(heap)
+
+    def set_load(self, executor_id: int, load: int) -> None:
+        self.loads[executor_id] = load
+        entry = (load, executor_id)
+        heapq.heappush(self.heap, entry)
+        heapq.heappush(self.group_heaps[self.executors[executor_id]["group"]], entry)
+        # Keep stale entries bounded, the rebuild is O(n) once every ~n updates
+        if len(self.heap) > 2 * len(self.loads) + 64:
+            self._rebuild()
+
+    def pick(self, n: int, group: Optional[str] = None) -> List[int]:
+        """Pop the n least-loaded live entries, O(n log m); callers push them back via set_load."""
+        heap = self.heap if group is None else self.group_heaps.get(group, [])
+        chosen: List[int] = []
+        while heap and len(chosen) < n:
+            load, executor_id = heapq.heappop(heap)
+            if self.loads.get(executor_id) == load and executor_id not in chosen:
+                chosen.append(executor_id)
+        return chosen
+
+
+class ExecutorLoadIndex:
+    """
+    In-process index: role -> executors keyed by their number of open assignments.
+
+    Roles are loaded lazily (roster from the routing cache, open loads with one
+    aggregate query) and re-read every `resync_interval` seconds. Between resyncs
+    loads are updated incrementally: `acquire()` on request creation, `release()`
+    when a request is closed.
+    """
+
+    def __init__(self, resync_interval: float = ASSIGNMENT_RESYNC_INTERVAL):
+        self.resync_interval = resync_interval
+        self._roles: Dict[str, _RoleLoads] = {}
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.released = 0
+        self.reloads = 0
+
+    def acquire(self, db: Session, role: str, n: int, group: Optional[str] = None) -> List[dict]:
+        """Reserve the n least-loaded executors of a role (ties go to the lowest id)."""
+        index = self._role(db, role)
+        with self._lock:
+            chosen = index.pick(n, group)
+            for executor_id in chosen:
+                index.set_load(executor_id, index.loads[executor_id] + 1)
+            self.acquired += len(chosen)
+            return [index.executors[executor_id] for executor_id in chosen]
+
+    def release(self, role: str, executor_ids: Iterable[int]) -> None:
+        """Give back load, after a request is closed or its creation rolled back."""
+        with self._lock:
+            index = self._roles.get(role)
+            if index is None:
+                # Not loaded (or invalidated): the next load reads the real counts
+                return
+            for executor_id in executor_ids:
+                if executor_id in index.loads:
+                    index.set_load(executor_id, max(0, index.loads[executor_id] - 1))
+                    self.released += 1
+
+    def invalidate(self, role: Optional[str] = None) -> None:
+        """Drop one role (or everything if None); it is reloaded on next use."""
+        with self._lock:
+            if role is None:
+                self._roles.clear()
+            else:
+                self._roles.pop(role, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "roles": len(self._roles),
+                "executors": sum(len(index.loads) for index in self._roles.values()),
+                "open_load": sum(sum(index.loads.values()) for index in self._roles.values()),
+                "acquired": self.acquired,
+                "released": self.released,
+                "reloads": self.reloads,
+                "resync_interval": self.resync_interval,
+            }
+
+    def _role(self, db: Session, role: str) -> _RoleLoads:
+        now = time.monotonic()
+        with self._lock:
+            index = self._roles.get(role)
+            if index is not None and index.expires_at > now:
+                return index
+
+        executors = routing_cache.get(db, role)
+        if not executors:
+            # Unknown categories come straight from clients, don't let them grow the index
+            return _RoleLoads([], {}, now)
+        loads = dict(db.connection().execute(OPEN_LOADS_BY_ROLE, {"role": role}).all())
+        loaded = _RoleLoads(executors, loads, time.monotonic() + self.resync_interval)
+
+        with self._lock:
+            # Another thread may have loaded the role meanwhile, keep its (already updated) copy
+            index = self._roles.get(role)
+            if index is not None and index.expires_at > now:
+                return index
+            self._roles[role] = loaded
+            self.reloads += 1
+            return loaded
+
+
+def assign_executors(db: Session, request, n: int = ASSIGNMENT_SIZE) -> List[dict]:
+    """
+    Pick the least-loaded executors for a flushed request and add its Assignment
+    rows to the session. The load is reserved immediately; if the commit fails,
+    give it back with `executor_load_index.release()`.
+    """
+    executors = executor_load_index.acquire(db, request.category, n)
+    for executor in executors:
+        db.add(Assignment(request_id=request.id, executor_id=executor["id"]))
+    return executors
+
+
+def assigned_executors(db: Session, request_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Stored executors of several requests, one query."""
+    result: Dict[int, List[dict]] = {request_id: [] for request_id in request_ids}
+    if not result:
+        return result
+    rows = db.connection().execute(ASSIGNED_EXECUTORS, {"request_ids": list(result)}).all()
+    for request_id, executor_id, name, group in rows:
+        result[request_id].append({"id": executor_id, "name": name, "group": group})
+    return result
+
+
+def close_assignments(db: Session, request_id: int) -> List[int]:
+    """Mark a request's open assignments closed; returns the executors to release after commit."""
+    return db.execute(
+        update(Assignment)
+        .where(Assignment.request_id == request_id, Assignment.closed_at.is_(None))
+        .values(closed_at=func.now())
+        .returning(Assignment.executor_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+
+# Shared instance used by the routes
+executor_load_index = ExecutorLoadIndex()
+# A changed roster (new executor, bulk import) must be re-read together with its loads
+routing_cache.add_invalidation_listener(executor_load_index.invalidate)
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
+from decouple import config
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from app.models.database import get_db, get_async_db
+from app.models.user import User
+from app.utils.security import SECRET_KEY, ALGORITHM
+
+
+# Verified tokens kept in the claims cache
+TOKEN_CACHE_SIZE = config("TOKEN_CACHE_SIZE", default=10000, cast=int)
+# Seconds a loaded user stays cached, 0 disables the user cache
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=30, cast=int)
+USER_CACHE_SIZE = config("USER_CACHE_SIZE", default=10000, cast=int)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# Built once, run on the session's connection: the dependency needs columns, not an ORM object
+CURRENT_USER_BY_MOBILE = (
+    select(User.id, User.mobile_number, User.name, User.email, User.role)
+    .where(User.mobile_number == bindparam("mobile_number"))
+)
+
+
+class CurrentUser(BaseModel):
+    id: int
+    mobile_number: str
+    name: str
+    email: Optional[str] = None
+    role: str
+
+
+class _TTLCache:
+    """Small LRU with a per-entry expiry timestamp (time.time())."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenVerifier:
+    """
+    Verifies bearer tokens and resolves them to a CurrentUser.
+
+    Verified claims are cached per token until the token's `exp`, users are
+    cached per mobile number for `user_ttl` seconds. Counters show how many
+    decodes and DB lookups were actually performed.
+    """
+
+    def __init__(self, token_cache_size: int = TOKEN_CACHE_SIZE, user_ttl: int = USER_CACHE_TTL,
+                 user_cache_size: int = USER_CACHE_SIZE):
+        self.user_ttl = user_ttl
+        self._claims = _TTLCache(token_cache_size)
+        self._users = _TTLCache(user_cache_size if user_ttl > 0 else 0)
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.claims_hits = 0
+        self.db_lookups = 0
+        self.user_hits = 0
+
+    def verify(self, token: str) -> dict:
+        """Claims of a valid token, raises 401 otherwise."""
+        claims = self._claims.get(token)
+        if claims is not None:
+            self._count("claims_hits")
+            return claims
+
+        self._count("decodes")
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
+        except jwt.ExpiredSignatureError:
+            raise _unauthorized("Token has expired")
+        except jwt.InvalidTokenError:
+            raise _unauthorized("Invalid token")
+
+        self._claims.set(token, claims, float(claims["exp"]))
+        return claims
+
+    def cached_user(self, mobile_number: str) -> Optional[CurrentUser]:
+        user = self._users.get(mobile_number)
+        if user is not None:
+            self._count("user_hits")
+        return user
+
+    def remember_user(self, user) -> CurrentUser:
+        """Cache a User or a CURRENT_USER_BY_MOBILE row."""
+        self._count("db_lookups")
+        current = CurrentUser(
+            id=user.id, mobile_number=user.mobile_number, name=user.name, email=user.email, role=user.role
+        )
+        self._users.set(user.mobile_number, current, time.time() + self.user_ttl)
+        return current
+
+    def invalidate_user(self, mobile_number: Optional[str] = None) -> None:
+        """Forget cached users, e.g. after a role change."""
+        if mobile_number is None:
+            self._users.clear()
+        else:
+            self._users.pop(mobile_number)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "decodes": self.decodes,
+                "claims_hits": self.claims_hits,
+                "claims_cached": len(self._claims),
+                "db_lookups": self.db_lookups,
+                "user_hits": self.user_hits,
+                "users_cached": len(self._users),
+            }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def get_token_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """Dependency: verified claims of the bearer token."""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    return token_verifier.verify(credentials.credentials)
+
+
+def get_current_user(claims: dict = Depends(get_token_claims), db: Session = Depends(get_db)) -> CurrentUser:
+    """Dependency: the user the bearer token was issued to."""
+    mobile_number = claims["sub"]
+    user = token_verifier.cached_user(mobile_number)
+    if user is not None:
+        return user
+
+    user = db.connection().execute(CURRENT_USER_BY_MOBILE, {"mobile_number": mobile_number}).first()
+    if not user:
+        raise _unauthorized("User not found")
+    return token_verifier.remember_user(user)
+
+
+async def get_current_user_async(claims: dict = Depends(get_token_claims), db=Depends(get_async_db)) -> CurrentUser:
+    """Dependency: the user the bearer token was issued to (async stack)."""
+    mobile_number = claims["sub"]
+    user = token_verifier.cached_user(mobile_number)
+    if user is not None:
+        return user
+
+    conn = await db.connection()
+    user = (await conn.execute(CURRENT_USER_BY_MOBILE, {"mobile_number": mobile_number})).first()
+    if not user:
+        raise _unauthorized("User not found")
+    return token_verifier.remember_user(user)
+
+
+def _require_admin(user: CurrentUser) -> CurrentUser:
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
+
+
+def get_admin_user(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """Dependency: the current user, 403 unless it is an admin."""
+    return _require_admin(user)
+
+
+async def get_admin_user_async(user: CurrentUser = Depends(get_current_user_async)) -> CurrentUser:
+    """Dependency: the current user, 403 unless it is an admin (async stack)."""
+    return _require_admin(user)
+
+
+# Shared instance used by the dependencies
+token_verifier = TokenVerifier()
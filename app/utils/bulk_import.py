@@ -0,0 +1,219 @@
+import argparse
+import csv
+import io
+import json
+import logging
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from decouple import config
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.executor import Executor
+from app.models.user import User
+from app.routes.executors import ExecutorCreate
+from app.routes.users import UserCreate, valid_roles
+from app.utils.hashing import password_hasher
+from app.utils.routing_cache import routing_cache
+from app.utils.stats import executors_registered
+
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = config("IMPORT_CHUNK_SIZE", default=1000, cast=int)
+# Per-row errors kept in the report, the rest are only counted
+IMPORT_MAX_ERRORS = config("IMPORT_MAX_ERRORS", default=1000, cast=int)
+
+IMPORT_TARGETS = {
+    "users": (User, UserCreate),
+    "executors": (Executor, ExecutorCreate),
+}
+
+
+def read_rows(stream: IO[bytes], file_format: str) -> Iterator[dict]:
+    """Stream rows from a CSV (header row required) or NDJSON file."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if file_format == "csv":
+        for row in csv.DictReader(text):
+            # Empty CSV cells mean "not provided"
+            yield {key: (value if value != "" else None) for key, value in row.items()}
+    elif file_format == "ndjson":
+        for line in text:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format: {file_format}. Use 'csv' or 'ndjson'")
+
+
+def guess_format(filename: Optional[str]) -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {"total": self.total, "inserted": self.inserted, "failed": self.failed, "errors": self.errors}
+
+
+def import_rows(db: Session, target: str, rows: Iterable[dict], chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Import users or executors chunk by chunk: validate, drop duplicates with one
+    query per chunk, hash passwords in parallel, insert with one executemany.
+    """
+    model, schema = IMPORT_TARGETS[target]
+    report = ImportReport()
+    numbered = enumerate(rows, start=1)
+    seen_numbers = set()
+    seen_emails = set()
+    touched_roles = set()
+
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        report.total += len(chunk)
+
+        # Validate and drop duplicates inside the file itself
+        candidates: List[Tuple[int, dict]] = []
+        for row_number, raw in chunk:
+            try:
+                item = schema(**raw)
+            except (ValidationError, TypeError) as e:
+                report.error(row_number, str(e))
+                continue
+            message = _check_row(target, item)
+            if message is None and item.mobile_number in seen_numbers:
+                message = "Duplicate mobile number in file"
+            if message is None and item.email and item.email in seen_emails:
+                message = "Duplicate email in file"
+            if message:
+                report.error(row_number, message)
+                continue
+            seen_numbers.add(item.mobile_number)
+            if item.email:
+                seen_emails.add(item.email)
+            candidates.append((row_number, item.model_dump()))
+
+        candidates = _drop_existing(db, model, candidates, report)
+        if not candidates:
+            continue
+
+        hashes = password_hasher.hash_many([values.pop("password") for _, values in candidates])
+        for (_, values), hashed_password in zip(candidates, hashes):
+            values["hashed_password"] = hashed_password
+
+        _insert_chunk(db, model, candidates, report)
+        if target == "executors":
+            touched_roles.update(values["role"] for _, values in candidates)
+
+    for role in touched_roles:
+        routing_cache.invalidate(role)
+    logger.info(f"Bulk import of {target}: {report.inserted} inserted, {report.failed} failed of {report.total}")
+    return report.as_dict()
+
+
+def _check_row(target: str, item) -> Optional[str]:
+    if target == "users" and item.role not in valid_roles:
+        return f"Invalid role. Choose from {valid_roles}."
+    if target == "executors" and not item.password:
+        return "Password is required for executors"
+    return None
+
+
+def _drop_existing(db: Session, model, candidates: List[Tuple[int, dict]], report: ImportReport):
+    """One set-based query per chunk for mobile numbers and emails already in the table."""
+    if not candidates:
+        return candidates
+    numbers = [values["mobile_number"] for _, values in candidates]
+    emails = [values["email"] for _, values in candidates if values.get("email")]
+    condition = model.mobile_number.in_(numbers)
+    if emails:
+        condition = or_(condition, model.email.in_(emails))
+    existing = db.execute(select(model.mobile_number, model.email).where(condition)).all()
+    existing_numbers = {number for number, _ in existing}
+    existing_emails = {email for _, email in existing if email}
+
+    remaining = []
+    for row_number, values in candidates:
+        if values["mobile_number"] in existing_numbers:
+            report.error(row_number, "Mobile number already registered")
+        elif values.get("email") and values["email"] in existing_emails:
+            report.error(row_number, "Email already registered")
+        else:
+            remaining.append((row_number, values))
+    return remaining
+
+
+def _insert_chunk(db: Session, model, candidates: List[Tuple[int, dict]], report: ImportReport) -> None:
+    try:
+        db.execute(insert(model), [values for _, values in candidates])
+        _count_inserted(db, model, [values for _, values in candidates])
+        db.commit()
+        report.inserted += len(candidates)
+        return
+    except IntegrityError:
+        # A concurrent writer got in between the check and the insert, find the offending rows
+        db.rollback()
+
+    inserted = []
+    for row_number, values in candidates:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [values])
+            inserted.append(values)
+        except IntegrityError as e:
+            report.error(row_number, f"Integrity error: {e.orig}")
+    _count_inserted(db, model, inserted)
+    db.commit()
+    report.inserted += len(inserted)
+
+
+def _count_inserted(db: Session, model, rows: List[dict]) -> None:
+    # Dashboard counters, in the same transaction as the rows
+    if model is Executor and rows:
+        db.execute(executors_registered(db, rows))
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Bulk import users or executors from CSV/NDJSON")
+    parser.add_argument("target", choices=sorted(IMPORT_TARGETS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """python -m app.utils.bulk_import executors partners.csv"""
+    from app.models.database import SessionLocal
+
+    args = _build_parser().parse_args(argv)
+    file_format = args.format or guess_format(args.path)
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            report = import_rows(db, args.target, read_rows(stream, file_format), chunk_size=args.chunk_size)
+    finally:
+        db.close()
+        password_hasher.shutdown()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
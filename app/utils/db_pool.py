@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Checkout wait histogram buckets, seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """Checkout counters and wait-time histogram of one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_sum += waited
+            self.wait_max = max(self.wait_max, waited)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(WAIT_BUCKETS + ("+Inf",), self.wait_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg": self.wait_sum / self.checkouts if self.checkouts else 0.0,
+                "wait_max": self.wait_max,
+                "wait_buckets": buckets,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times how long each checkout waits for a connection (incl. opening a new one)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timed_out()
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine) -> dict:
+    """Live state of an engine's pool plus checkout metrics."""
+    pool = engine.pool
+    stats = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
+
+
+def prewarm(engine, connections: int) -> int:
+    """Open `connections` connections up front so the first requests don't pay for it."""
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+async def prewarm_async(async_engine, connections: int) -> int:
+    """
+    Async variant of prewarm, connections are opened concurrently. Every one
+    that opened is returned to the pool before the first error is raised.
+    """
+    results = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(connections)), return_exceptions=True
+    )
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    await asyncio.gather(*(connection.close() for connection in opened))
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+    return len(opened)
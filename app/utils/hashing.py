@@ -0,0 +1,168 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional
+
+from bcrypt import hashpw, gensalt
+from decouple import config
+from fastapi import HTTPException
+
+
+# bcrypt cost factor (2^rounds iterations)
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=12, cast=int)
+# Worker processes, defaults to the available cores
+HASH_WORKERS = config("HASH_WORKERS", default=os.cpu_count() or 1, cast=int)
+# Hashes allowed to wait for a free worker before new ones are rejected with 503
+HASH_QUEUE_SIZE = config("HASH_QUEUE_SIZE", default=64, cast=int)
+HASH_RETRY_AFTER = config("HASH_RETRY_AFTER", default=1, cast=int)
+
+# Latency histogram buckets, seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _bcrypt_hash(password: bytes, rounds: int) -> bytes:
+    """Runs inside a worker process."""
+    return hashpw(password, gensalt(rounds))
+
+
+class PasswordHasher:
+    """
+    Process pool for bcrypt hashing shared by all registration paths.
+
+    At most `workers + queue_size` hashes are admitted at once; beyond that
+    `submit()` raises 503 with Retry-After instead of piling up request threads.
+    """
+
+    def __init__(
+        self,
+        workers: int = HASH_WORKERS,
+        queue_size: int = HASH_QUEUE_SIZE,
+        rounds: int = BCRYPT_ROUNDS,
+        retry_after: int = HASH_RETRY_AFTER,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self.retry_after = retry_after
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def submit(self, password: str) -> Future:
+        """Queue a hash; the future resolves to the bcrypt hash as str."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Password hashing queue is full, try again later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._get_pool().submit(_bcrypt_hash, password.encode("utf-8"), self.rounds)
+        except Exception:
+            self._finish(started)
+            raise
+        future.add_done_callback(lambda _: self._finish(started))
+
+        result: Future = Future()
+
+        def _decode(done: Future):
+            if done.cancelled():
+                # shutdown() cancelled it before a worker picked it up; wakes hash() with CancelledError
+                result.cancel()
+            elif done.exception() is not None:
+                result.set_exception(done.exception())
+            else:
+                result.set_result(done.result().decode("utf-8"))
+
+        future.add_done_callback(_decode)
+        return result
+
+    def hash(self, password: str) -> str:
+        """Hash from a sync route (blocks the calling thread, not the CPU)."""
+        return self.submit(password).result()
+
+    async def hash_async(self, password: str) -> str:
+        """Hash from an async route without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(password))
+
+    def hash_many(self, passwords: List[Optional[str]]) -> List[Optional[str]]:
+        """
+        Hash a batch (bulk import) in parallel. At most `workers` batch jobs are
+        queued at a time, so interactive hashes still get a worker promptly.
+        """
+        results: List[Optional[str]] = [None] * len(passwords)
+        window: deque = deque()
+        pool = self._get_pool()
+        for index, password in enumerate(passwords):
+            if password is None:
+                continue
+            if len(window) >= self.workers:
+                done_index, future = window.popleft()
+                results[done_index] = future.result().decode("utf-8")
+            window.append((index, pool.submit(_bcrypt_hash, password.encode("utf-8"), self.rounds)))
+        for done_index, future in window:
+            results[done_index] = future.result().decode("utf-8")
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.latency_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_capacity": self.queue_size,
+                "in_flight": self.in_flight,
+                "queue_depth": max(self.in_flight - self.workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "latency_avg": self.latency_sum / self.completed if self.completed else 0.0,
+                "latency_buckets": buckets,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _finish(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.latency_sum += elapsed
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+        self._slots.release()
+
+
+# Shared instance used by hash_password and the register routes
+password_hasher = PasswordHasher()
@@ -0,0 +1,482 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import (
+    Column, Float, Integer, LargeBinary, MetaData, String, Table, Text, create_engine, delete, func, select, update,
+)
+from sqlalchemy.exc import IntegrityError
+
+
+IDEMPOTENCY_ENABLED = config("IDEMPOTENCY_ENABLED", default=True, cast=bool)
+# "memory" keeps responses per process, "sql" shares them between workers
+IDEMPOTENCY_BACKEND = config("IDEMPOTENCY_BACKEND", default="memory")
+# SQLite file or Postgres URL for the "sql" backend
+IDEMPOTENCY_DATABASE_URL = config("IDEMPOTENCY_DATABASE_URL", default="sqlite:///idempotency_keys.db")
+# Seconds a stored response is replayed for a retried key
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=86400, cast=int)
+# Seconds a key stays claimed by a request still running; a worker that died frees it after that
+IDEMPOTENCY_LOCK_TTL = config("IDEMPOTENCY_LOCK_TTL", default=60, cast=int)
+# Stored keys, the oldest are evicted first
+IDEMPOTENCY_MAX_ENTRIES = config("IDEMPOTENCY_MAX_ENTRIES", default=100000, cast=int)
+# Larger responses are not stored, a retry runs the request again
+IDEMPOTENCY_MAX_BODY = config("IDEMPOTENCY_MAX_BODY", default=65536, cast=int)
+# Seconds a duplicate waits for the first request before it gets 409
+IDEMPOTENCY_WAIT_TIMEOUT = config("IDEMPOTENCY_WAIT_TIMEOUT", default=10.0, cast=float)
+# How often a duplicate re-checks a key claimed by another worker, seconds
+IDEMPOTENCY_POLL_INTERVAL = config("IDEMPOTENCY_POLL_INTERVAL", default=0.05, cast=float)
+IDEMPOTENCY_SWEEP_INTERVAL = config("IDEMPOTENCY_SWEEP_INTERVAL", default=60, cast=int)
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# Without Authorization all anonymous clients share one key space: their keys must be
+# random enough not to collide (a UUID, 32 hex digits without the dashes)
+MIN_ANONYMOUS_KEY_LENGTH = 32
+# Creates that clients retry; the bulk imports are left out (large bodies, their own error report)
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/requests/requests$"),
+    re.compile(r"^/users/users/register$"),
+    re.compile(r"^/executors/executors/register$"),
+    re.compile(r"^/auth/register$"),
+]
+# Worth retrying for real: not stored, the key is released
+RETRYABLE_STATUSES = {408, 429}
+
+STARTED, REPLAY, IN_PROGRESS, MISMATCH = "started", "replay", "in_progress", "mismatch"
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class IdempotencyStore(ABC):
+    """
+    Responses by idempotency key.
+
+    `begin()` claims a key for `lock_ttl` seconds, or reports what happened
+    to it: a stored response to replay, a request still running, or a
+    different request (fingerprint) under the same key. `complete()` stores
+    the response for `ttl` seconds, `release()` gives the key up so a retry
+    runs again. Expired keys are swept at most every `sweep_interval` seconds
+    as a side effect of `begin()`; beyond `max_entries` the oldest stored
+    responses are evicted, keys of running requests never are.
+    """
+
+    # True if the methods do I/O and must run in the threadpool
+    blocking = False
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL, lock_ttl: int = IDEMPOTENCY_LOCK_TTL,
+                 max_entries: int = IDEMPOTENCY_MAX_ENTRIES, sweep_interval: int = IDEMPOTENCY_SWEEP_INTERVAL):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self.evictions = 0
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+        return self._begin(key, fingerprint, now)
+
+    @abstractmethod
+    def complete(self, key: str, response: StoredResponse) -> None:
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete expired keys, returns how many were removed."""
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    @abstractmethod
+    def _begin(self, key: str, fingerprint: str, now: float) -> Tuple[str, Optional[StoredResponse]]:
+        ...
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store: retries that reach another worker run again."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # key -> (fingerprint, expires_at, response or None while running)
+        self._entries: "OrderedDict[str, Tuple[str, float, Optional[StoredResponse]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _begin(self, key: str, fingerprint: str, now: float) -> Tuple[str, Optional[StoredResponse]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                if entry[0] != fingerprint:
+                    return MISMATCH, None
+                return (REPLAY, entry[2]) if entry[2] is not None else (IN_PROGRESS, None)
+            self._entries[key] = (fingerprint, now + self.lock_ttl, None)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._evict(len(self._entries) - self.max_entries)
+            return STARTED, None
+
+    def _evict(self, excess: int) -> None:
+        """Drop the `excess` oldest stored responses; running claims stay (they expire after lock_ttl)."""
+        evicted = []
+        for key, (_, _, response) in self._entries.items():
+            if response is not None:
+                evicted.append(key)
+                if len(evicted) == excess:
+                    break
+        for key in evicted:
+            del self._entries[key]
+        self.evictions += len(evicted)
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], time.time() + self.ttl, response)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLIdempotencyStore(IdempotencyStore):
+    """Store shared by all workers, backed by a SQLite file or a Postgres table."""
+
+    blocking = True
+
+    metadata = MetaData()
+    table = Table(
+        "idempotency_keys",
+        metadata,
+        Column("key", String, primary_key=True),
+        Column("fingerprint", String, nullable=False),
+        Column("expires_at", Float, nullable=False, index=True),
+        # NULL while the first request is running
+        Column("status", Integer, nullable=True),
+        Column("headers", Text, nullable=True),  # JSON list of [name, value]
+        Column("body", LargeBinary, nullable=True),
+    )
+
+    def __init__(self, url: str = IDEMPOTENCY_DATABASE_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = create_engine(url)
+        self.metadata.create_all(self.engine, checkfirst=True)
+
+    def _begin(self, key: str, fingerprint: str, now: float) -> Tuple[str, Optional[StoredResponse]]:
+        table = self.table
+        try:
+            with self.engine.begin() as conn:
+                row = conn.execute(
+                    select(table.c.fingerprint, table.c.expires_at, table.c.status, table.c.headers, table.c.body)
+                    .where(table.c.key == key)
+                    .with_for_update()
+                ).first()
+                if row is not None and row.expires_at > now:
+                    if row.fingerprint != fingerprint:
+                        return MISMATCH, None
+                    if row.status is None:
+                        return IN_PROGRESS, None
+                    headers = [tuple(header) for header in json.loads(row.headers)]
+                    return REPLAY, StoredResponse(row.status, headers, row.body)
+                if row is not None:
+                    conn.execute(delete(table).where(table.c.key == key))
+                conn.execute(table.insert().values(key=key, fingerprint=fingerprint, expires_at=now + self.lock_ttl))
+        except IntegrityError:
+            # Another worker claimed the key between the SELECT and the INSERT
+            return IN_PROGRESS, None
+        return STARTED, None
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.table)
+                .where(self.table.c.key == key)
+                .values(expires_at=time.time() + self.ttl, status=response.status,
+                        headers=json.dumps(response.headers), body=response.body)
+            )
+
+    def release(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.key == key))
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        table = self.table
+        with self.engine.begin() as conn:
+            removed = conn.execute(delete(table).where(table.c.expires_at <= now)).rowcount
+            excess = conn.scalar(select(func.count()).select_from(table)) - self.max_entries
+            if excess > 0:
+                # Stored responses soonest to expire first, i.e. the oldest; running claims are kept
+                oldest = (
+                    select(table.c.key).where(table.c.status.is_not(None))
+                    .order_by(table.c.expires_at).limit(excess).scalar_subquery()
+                )
+                self.evictions += conn.execute(delete(table).where(table.c.key.in_(oldest))).rowcount
+        return removed
+
+    def size(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.scalar(select(func.count()).select_from(self.table))
+
+
+def build_idempotency_store(backend: str = IDEMPOTENCY_BACKEND) -> IdempotencyStore:
+    if backend == "memory":
+        return MemoryIdempotencyStore()
+    if backend == "sql":
+        return SQLIdempotencyStore()
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {backend}")
+
+
+def is_idempotent_route(method: str, path: str) -> bool:
+    return method == "POST" and any(pattern.match(path) for pattern in IDEMPOTENT_ROUTES)
+
+
+def _error(status_code: int, detail: str, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    return ORJSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class IdempotencyGuard:
+    """
+    Runs a request at most once per idempotency key: the first request with a
+    key runs and its response is stored; retries with the same key and body
+    get that response back without reaching the route. A duplicate arriving
+    while the first one runs waits for it, up to `wait_timeout` seconds.
+    """
+
+    def __init__(self, store: IdempotencyStore, enabled: bool = IDEMPOTENCY_ENABLED,
+                 wait_timeout: float = IDEMPOTENCY_WAIT_TIMEOUT):
+        self.store = store
+        self.enabled = enabled
+        self.wait_timeout = wait_timeout
+        # Keys whose first request runs in this worker: duplicates wait on the event instead of polling
+        self._running: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self.stored = 0
+        self.released = 0
+        self.replays = 0
+        self.waits = 0
+        self.conflicts = 0
+        self.mismatches = 0
+
+    async def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        """STARTED (the caller runs the request, then calls finish()), REPLAY, MISMATCH or IN_PROGRESS."""
+        status, stored = await self._call(self.store.begin, key, fingerprint)
+        if status == IN_PROGRESS:
+            self.waits += 1
+            status, stored = await self._wait(key, fingerprint)
+        if status == STARTED:
+            self._running[key] = (asyncio.get_running_loop(), asyncio.Event())
+        elif status == REPLAY:
+            self.replays += 1
+        elif status == MISMATCH:
+            self.mismatches += 1
+        else:
+            self.conflicts += 1
+        return status, stored
+
+    async def finish(self, key: str, response: Optional[StoredResponse]) -> None:
+        """Store the response of a STARTED key, or release the key if None; wakes the waiting duplicates."""
+        try:
+            if response is not None:
+                self.stored += 1
+                await self._call(self.store.complete, key, response)
+            else:
+                self.released += 1
+                await self._call(self.store.release, key)
+        finally:
+            running = self._running.pop(key, None)
+            if running is not None:
+                running[1].set()
+
+    async def _wait(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return IN_PROGRESS, None
+            running = self._running.get(key)
+            try:
+                if running is not None and running[0] is asyncio.get_running_loop():
+                    await asyncio.wait_for(running[1].wait(), remaining)
+                else:
+                    # Claimed by another worker (or loop): poll the shared store
+                    await asyncio.sleep(min(IDEMPOTENCY_POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                return IN_PROGRESS, None
+            status, stored = await self._call(self.store.begin, key, fingerprint)
+            if status != IN_PROGRESS:
+                # STARTED if the first request failed: this one runs instead
+                return status, stored
+
+    async def _call(self, fn, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.store).__name__,
+            "keys": self.store.size(),
+            "max_entries": self.store.max_entries,
+            "ttl": self.store.ttl,
+            "running": len(self._running),
+            "stored": self.stored,
+            "released": self.released,
+            "replays": self.replays,
+            "waits": self.waits,
+            "conflicts": self.conflicts,
+            "mismatches": self.mismatches,
+            "evictions": self.store.evictions,
+        }
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware for `Idempotency-Key` on the create endpoints
+    (IDEMPOTENT_ROUTES). Replays carry `Idempotent-Replayed: true`; a
+    duplicate still waiting after `wait_timeout` gets 409, the same key with
+    a different request 422. Keys are scoped by the route and the
+    Authorization header; anonymous callers (registration, for one) share a
+    key space and must send unique keys such as UUIDs, shorter keys get 400.
+
+    5xx, 408/429 and responses over IDEMPOTENCY_MAX_BODY are not stored: the
+    key is released and a retry runs the request again.
+    """
+
+    def __init__(self, app, guard: "IdempotencyGuard" = None):
+        self.app = app
+        self.guard = guard or idempotency_guard
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.guard.enabled or not is_idempotent_route(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = dict(scope["headers"]).get(HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+        if len(idempotency_key) < MIN_ANONYMOUS_KEY_LENGTH and b"authorization" not in dict(scope["headers"]):
+            await _error(400, f"Idempotency-Key without Authorization must be at least {MIN_ANONYMOUS_KEY_LENGTH} "
+                              f"characters, e.g. a UUID")(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        key = _key(scope, idempotency_key)
+        status, stored = await self.guard.begin(key, _fingerprint(scope, body))
+        if status == REPLAY:
+            await _replay(stored, send)
+        elif status == MISMATCH:
+            await _error(422, "Idempotency-Key was already used for a different request")(scope, receive, send)
+        elif status == IN_PROGRESS:
+            await _error(409, "A request with this Idempotency-Key is still in progress",
+                         {"Retry-After": "1"})(scope, receive, send)
+        else:
+            await self._run(scope, _replay_body(body, receive), send, key)
+
+    async def _run(self, scope, receive, send, key: str) -> None:
+        response = {"status": 500, "headers": [], "body": bytearray(), "complete": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(name.decode("latin-1"), value.decode("latin-1"))
+                                       for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                if response["body"] is not None:
+                    response["body"] += message.get("body", b"")
+                    if len(response["body"]) > IDEMPOTENCY_MAX_BODY:
+                        response["body"] = None
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            status = response["status"]
+            keep = (response["complete"] and response["body"] is not None
+                    and status < 500 and status not in RETRYABLE_STATUSES)
+            await self.guard.finish(
+                key, StoredResponse(status, response["headers"], bytes(response["body"])) if keep else None
+            )
+
+
+def _key(scope, idempotency_key: bytes) -> str:
+    """Stored key: the header value within the route and the caller's Authorization."""
+    authorization = dict(scope["headers"]).get(b"authorization", b"")
+    path = scope["path"].encode("utf-8")
+    return hashlib.sha256(path + b"\n" + authorization + b"\n" + idempotency_key).hexdigest()
+
+
+def _fingerprint(scope, body: bytes) -> str:
+    request = f"{scope['method']} {scope['path']}?{scope.get('query_string', b'').decode('latin-1')}\n"
+    return hashlib.sha256(request.encode() + body).hexdigest()
+
+
+async def _read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    return bytes(body)
+
+
+def _replay_body(body: bytes, receive):
+    """`receive` for the app: the body read already, then the client's own messages (disconnect)."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def _replay(stored: StoredResponse, send) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+# Shared instance used by the middleware and /idempotency/stats
+idempotency_guard = IdempotencyGuard(build_idempotency_store())
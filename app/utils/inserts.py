@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+
+# Dialect inserts that support ON CONFLICT (SQLite >= 3.35 for RETURNING)
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# SQLSTATE codes of integrity violations, Postgres drivers expose them as `pgcode`
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+
+def _dialect_name(db) -> str:
+    """Dialect of a session (sync or async) or a connection."""
+    dialect = getattr(db, "dialect", None)
+    return (dialect or db.get_bind().dialect).name
+
+
+def upsert(db, model, conflict: List[str], values: dict):
+    """
+    `INSERT ... ON CONFLICT (conflict) DO UPDATE SET <other columns> = excluded`:
+    writes the row whether or not the key exists, in one statement, so two
+    concurrent writers of the same key can't both miss it and collide.
+    """
+    insert = _INSERTS[_dialect_name(db)]
+    statement = insert(model).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=conflict,
+        set_={column: statement.excluded[column] for column in values if column not in conflict},
+    )
+
+
+def insert_if_absent(db, model, conflict: List[str], values: dict):
+    """
+    `INSERT ... ON CONFLICT (conflict) DO NOTHING RETURNING <model>` for the
+    session's dialect (sync or async session). Executed with `db.scalars()` it
+    yields the new ORM object, or nothing if a row with the same key exists:
+    the existence check, the insert and the server defaults in one round trip.
+    """
+    insert = _INSERTS[_dialect_name(db)]
+    return insert(model).values(**values).on_conflict_do_nothing(index_elements=conflict).returning(model)
+
+
+@lru_cache(maxsize=None)
+def _insert_rows_if_absent(dialect: str, table, conflict: Tuple[str, ...], returning: Tuple[str, ...]):
+    insert = _INSERTS[dialect]
+    return (
+        insert(table)
+        .on_conflict_do_nothing(index_elements=list(conflict))
+        .returning(*(table.c[column] for column in returning))
+    )
+
+
+def insert_rows_if_absent(db, model, conflict: List[str], returning: List[str]):
+    """
+    Like `insert_if_absent`, but built once per (dialect, model, key, columns)
+    and without values: execute it on `db.connection()` with the values as
+    parameters. It returns a Row with the `returning` columns instead of an ORM
+    object, skipping statement construction, the ORM execution path and the
+    identity map, for callers that only need a few columns back.
+    """
+    return _insert_rows_if_absent(_dialect_name(db), model.__table__, tuple(conflict), tuple(returning))
+
+
+def increment_counters(db, model, conflict: List[str], rows: List[dict], counters: List[str]):
+    """
+    `INSERT ... VALUES rows ON CONFLICT (conflict) DO UPDATE SET c = c + excluded.c`
+    for every column in `counters`: applies deltas to counter rows, creating them
+    on first use, without reading them first. Rows are written in key order so
+    two transactions touching the same counters lock them in the same order.
+    """
+    insert = _INSERTS[_dialect_name(db)]
+    rows = sorted(rows, key=lambda row: tuple(row[column] for column in conflict))
+    statement = insert(model).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=conflict,
+        set_={column: getattr(model, column) + statement.excluded[column] for column in counters},
+    )
+
+
+def violation(error: IntegrityError) -> Optional[str]:
+    """"foreign_key", "unique" or None for other integrity errors."""
+    code = getattr(error.orig, "pgcode", None)
+    message = str(error.orig)
+    if code == FOREIGN_KEY_VIOLATION or "FOREIGN KEY constraint failed" in message:
+        return "foreign_key"
+    if code == UNIQUE_VIOLATION or "UNIQUE constraint failed" in message:
+        return "unique"
+    return None
@@ -0,0 +1,179 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Latency buckets, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# SQL statements per request buckets
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-on-export histogram; observe() is a bisect and two adds."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class QueryStats:
+    """SQL statements and DB time of the current request."""
+
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+# Set by the middleware; copied into the threadpool for sync routes
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (method, route) -> histograms
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.statements: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], float] = {}
+        # (method, route, status) -> count
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float, stats: QueryStats) -> None:
+        key = (method, route)
+        with self._lock:
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+                self.db_time[key] = 0.0
+            latency.observe(elapsed)
+            if stats.statements:
+                self.statements[key].observe(stats.statements)
+                self.db_time[key] += stats.db_time
+            else:
+                self.statements[key].counts[0] += 1
+                self.statements[key].count += 1
+            status_key = (method, route, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self, gauges: Optional[Dict[str, float]] = None, counters: Optional[Dict[str, float]] = None) -> str:
+        """
+        Prometheus text exposition format. `gauges` are current values,
+        `counters` only ever grow and are exported as `<name>_total`.
+        """
+        lines = []
+        with self._lock:
+            lines += _render_histograms(
+                "http_request_duration_seconds", "Request latency by route", self.latency
+            )
+            lines += _render_histograms(
+                "http_request_sql_statements", "SQL statements executed per request", self.statements
+            )
+            lines.append("# HELP http_request_db_seconds_total Time spent in SQL per route")
+            lines.append("# TYPE http_request_db_seconds_total counter")
+            for (method, route), value in sorted(self.db_time.items()):
+                lines.append(f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {value}')
+            lines.append("# HELP http_responses_total Responses by route and status")
+            lines.append("# TYPE http_responses_total counter")
+            for (method, route, status), value in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {value}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for name, value in sorted((counters or {}).items()):
+            lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(name: str, help_text: str, histograms: Dict[Tuple[str, str], Histogram]):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        labels = f'method="{method}",route="{route}"'
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: per-route latency and status counts, plus SQL
+    statement count / DB time per request reported in X-DB-* headers.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics_registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-queries", b"%d" % stats.statements),
+                    (b"x-db-time-ms", b"%.2f" % (stats.db_time * 1000)),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            self.registry.observe_request(
+                scope["method"], route_path, status, time.perf_counter() - started, stats
+            )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is None:
+        return
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        stats.db_time += time.perf_counter() - started
+    stats.statements += 1
+
+
+# Shared registry rendered by GET /metrics
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,165 @@
+import hmac
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import Column, Integer, MetaData, String, Float, Table, create_engine, delete, select, update
+
+from app.utils.inserts import upsert
+
+
+# "memory" keeps codes per process, "sql" shares them between workers
+OTP_BACKEND = config("OTP_BACKEND", default="memory")
+# SQLite file or Postgres URL for the "sql" backend
+OTP_DATABASE_URL = config("OTP_DATABASE_URL", default="sqlite:///otp_codes.db")
+OTP_TTL = config("OTP_TTL", default=300, cast=int)
+OTP_MAX_ATTEMPTS = config("OTP_MAX_ATTEMPTS", default=5, cast=int)
+OTP_SWEEP_INTERVAL = config("OTP_SWEEP_INTERVAL", default=60, cast=int)
+
+
+def _codes_match(stored: str, code: str) -> bool:
+    """Constant-time comparison; on bytes, compare_digest rejects non-ASCII str with TypeError."""
+    return hmac.compare_digest(stored.encode("utf-8"), code.encode("utf-8"))
+
+
+class OTPStore(ABC):
+    """
+    Storage for one-time SMS codes.
+
+    A code expires after `ttl` seconds and is burned after `max_attempts`
+    failed verifications or one successful one. Expired entries are swept
+    at most every `sweep_interval` seconds as a side effect of `put()`.
+    """
+
+    def __init__(self, ttl: int = OTP_TTL, max_attempts: int = OTP_MAX_ATTEMPTS, sweep_interval: int = OTP_SWEEP_INTERVAL):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def put(self, mobile_number: str, code: str) -> None:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+        self._put(mobile_number, code, now + self.ttl)
+
+    @abstractmethod
+    def verify(self, mobile_number: str, code: str) -> bool:
+        ...
+
+    @abstractmethod
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete expired codes, returns how many were removed."""
+
+    @abstractmethod
+    def _put(self, mobile_number: str, code: str, expires_at: float) -> None:
+        ...
+
+
+class MemoryOTPStore(OTPStore):
+    """Per-process store, fine for a single worker and for local runs."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # mobile_number -> (code, expires_at, attempts)
+        self._codes: Dict[str, Tuple[str, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, mobile_number: str, code: str, expires_at: float) -> None:
+        with self._lock:
+            self._codes[mobile_number] = (code, expires_at, 0)
+
+    def verify(self, mobile_number: str, code: str) -> bool:
+        with self._lock:
+            entry = self._codes.get(mobile_number)
+            if entry is None:
+                return False
+            stored_code, expires_at, attempts = entry
+            if expires_at <= time.time():
+                del self._codes[mobile_number]
+                return False
+            if _codes_match(stored_code, code):
+                del self._codes[mobile_number]
+                return True
+            attempts += 1
+            if attempts >= self.max_attempts:
+                del self._codes[mobile_number]
+            else:
+                self._codes[mobile_number] = (stored_code, expires_at, attempts)
+            return False
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [number for number, (_, expires_at, _) in self._codes.items() if expires_at <= now]
+            for number in expired:
+                del self._codes[number]
+        return len(expired)
+
+
+class SQLOTPStore(OTPStore):
+    """Store shared by all workers, backed by a SQLite file or a Postgres table."""
+
+    metadata = MetaData()
+    table = Table(
+        "sms_codes",
+        metadata,
+        Column("mobile_number", String, primary_key=True),
+        Column("code", String, nullable=False),
+        Column("expires_at", Float, nullable=False, index=True),
+        Column("attempts", Integer, nullable=False, default=0),
+    )
+
+    def __init__(self, url: str = OTP_DATABASE_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = create_engine(url)
+        self.metadata.create_all(self.engine, checkfirst=True)
+
+    def _put(self, mobile_number: str, code: str, expires_at: float) -> None:
+        # One upsert: two concurrent send-sms calls for a number both succeed, the last code wins
+        with self.engine.begin() as conn:
+            conn.execute(upsert(conn, self.table, ["mobile_number"], {
+                "mobile_number": mobile_number, "code": code, "expires_at": expires_at, "attempts": 0,
+            }))
+
+    def verify(self, mobile_number: str, code: str) -> bool:
+        table = self.table
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(table.c.code, table.c.expires_at, table.c.attempts)
+                .where(table.c.mobile_number == mobile_number)
+                .with_for_update()
+            ).first()
+            if row is None:
+                return False
+            if row.expires_at <= time.time():
+                conn.execute(delete(table).where(table.c.mobile_number == mobile_number))
+                return False
+            if _codes_match(row.code, code):
+                conn.execute(delete(table).where(table.c.mobile_number == mobile_number))
+                return True
+            if row.attempts + 1 >= self.max_attempts:
+                conn.execute(delete(table).where(table.c.mobile_number == mobile_number))
+            else:
+                conn.execute(
+                    update(table)
+                    .where(table.c.mobile_number == mobile_number)
+                    .values(attempts=table.c.attempts + 1)
+                )
+            return False
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        with self.engine.begin() as conn:
+            return conn.execute(delete(self.table).where(self.table.c.expires_at <= now)).rowcount
+
+
+def build_otp_store(backend: str = OTP_BACKEND) -> OTPStore:
+    if backend == "memory":
+        return MemoryOTPStore()
+    if backend == "sql":
+        return SQLOTPStore()
+    raise ValueError(f"Unknown OTP_BACKEND: {backend}")
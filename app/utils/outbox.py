@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import select, update
+
+from app.models.database import SessionLocal
+from app.models.outbox import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# "kafka" publishes to KAFKA_BOOTSTRAP_SERVERS, "memory" keeps messages in-process (tests, local runs)
+OUTBOX_BROKER = config("OUTBOX_BROKER", default="kafka")
+OUTBOX_RELAY_ENABLED = config("OUTBOX_RELAY_ENABLED", default=True, cast=bool)
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=500, cast=int)
+OUTBOX_POLL_INTERVAL = config("OUTBOX_POLL_INTERVAL", default=0.5, cast=float)
+OUTBOX_MAX_BACKOFF = config("OUTBOX_MAX_BACKOFF", default=30.0, cast=float)
+REQUEST_CREATED_TOPIC = config("REQUEST_CREATED_TOPIC", default="request-created")
+
+KAFKA_BOOTSTRAP_SERVERS = config("KAFKA_BOOTSTRAP_SERVERS", default="localhost:9092")
+KAFKA_LINGER_MS = config("KAFKA_LINGER_MS", default=20, cast=int)
+KAFKA_MAX_BATCH_BYTES = config("KAFKA_MAX_BATCH_BYTES", default=262144, cast=int)
+KAFKA_COMPRESSION = config("KAFKA_COMPRESSION", default="gzip")
+KAFKA_REQUEST_TIMEOUT_MS = config("KAFKA_REQUEST_TIMEOUT_MS", default=30000, cast=int)
+KAFKA_RETRY_BACKOFF_MS = config("KAFKA_RETRY_BACKOFF_MS", default=200, cast=int)
+
+
+def request_created_event(request, executor_ids: Optional[List[int]] = None) -> OutboxEvent:
+    """Outbox row for a new Request; add it to the same session before commit."""
+    payload = {
+        "type": "request.created",
+        "request_id": request.id,
+        "title": request.title,
+        "category": request.category,
+        "status": request.status,
+        "user_id": request.user_id,
+        # Executors to notify
+        "assigned_executors": executor_ids or [],
+    }
+    return OutboxEvent(
+        topic=REQUEST_CREATED_TOPIC,
+        key=request.category,
+        payload=json.dumps(payload),
+        attempts=0,
+    )
+
+
+class InMemoryPublisher:
+    """Fake broker: collects messages in a list instead of sending them."""
+
+    def __init__(self):
+        self.messages: List[Tuple[str, Optional[str], bytes]] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish_batch(self, events: List[OutboxEvent]) -> None:
+        for event in events:
+            self.messages.append((event.topic, event.key, event.payload.encode("utf-8")))
+
+
+class KafkaPublisher:
+    """aiokafka producer; a batch is sent in one go and awaited as a whole."""
+
+    def __init__(self, bootstrap_servers: str = KAFKA_BOOTSTRAP_SERVERS):
+        self.bootstrap_servers = bootstrap_servers
+        self._producer = None
+
+    async def start(self) -> None:
+        from aiokafka import AIOKafkaProducer
+
+        producer = AIOKafkaProducer(
+            bootstrap_servers=self.bootstrap_servers,
+            acks="all",
+            enable_idempotence=True,
+            linger_ms=KAFKA_LINGER_MS,
+            max_batch_size=KAFKA_MAX_BATCH_BYTES,
+            compression_type=KAFKA_COMPRESSION,
+            request_timeout_ms=KAFKA_REQUEST_TIMEOUT_MS,
+            retry_backoff_ms=KAFKA_RETRY_BACKOFF_MS,
+        )
+        try:
+            await producer.start()
+        except Exception:
+            # Broker unreachable: close the half-started client, the relay retries with a new one
+            await producer.stop()
+            raise
+        self._producer = producer
+
+    async def stop(self) -> None:
+        if self._producer is not None:
+            await self._producer.stop()
+            self._producer = None
+
+    async def publish_batch(self, events: List[OutboxEvent]) -> None:
+        sends = [
+            await self._producer.send(
+                event.topic,
+                value=event.payload.encode("utf-8"),
+                key=event.key.encode("utf-8") if event.key else None,
+            )
+            for event in events
+        ]
+        await asyncio.gather(*sends)
+
+
+class OutboxRelay:
+    """
+    Background task that moves unpublished outbox rows to the broker.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED so several workers can run a
+    relay side by side; a row is marked published only after the broker acked
+    the whole batch (at-least-once delivery). Failures back off exponentially,
+    connecting to the broker included: the app boots without one and the
+    relay catches up once it is reachable.
+    """
+
+    def __init__(self, publisher, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 session_factory=SessionLocal):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self.published = 0
+        self.failures = 0
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.connected:
+            self.connected = False
+            await self.publisher.stop()
+
+    async def relay_once(self) -> int:
+        """Publish one batch, returns the number of events sent."""
+        db = self.session_factory()
+        try:
+            events = await asyncio.to_thread(self._claim_batch, db)
+            if not events:
+                await asyncio.to_thread(db.rollback)
+                return 0
+            try:
+                await self.publisher.publish_batch(events)
+            except Exception:
+                await asyncio.to_thread(self._mark_failed, db, events)
+                raise
+            await asyncio.to_thread(self._mark_published, db, events)
+            self.published += len(events)
+            return len(events)
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def _run(self) -> None:
+        backoff = self.poll_interval
+        while True:
+            try:
+                if not self.connected:
+                    await self.publisher.start()
+                    self.connected = True
+                sent = await self.relay_once()
+                backoff = self.poll_interval
+                if sent == self.batch_size:
+                    continue  # Backlog left, don't sleep
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                backoff = min(backoff * 2, OUTBOX_MAX_BACKOFF)
+                logger.exception("Outbox relay failed, retrying in %.1fs", backoff)
+            await asyncio.sleep(backoff)
+
+    def _claim_batch(self, db) -> List[OutboxEvent]:
+        return db.scalars(
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+    @staticmethod
+    def _mark_published(db, events: List[OutboxEvent]) -> None:
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([event.id for event in events]))
+            .values(published_at=datetime.utcnow(), attempts=OutboxEvent.attempts + 1)
+        )
+        db.commit()
+
+    @staticmethod
+    def _mark_failed(db, events: List[OutboxEvent]) -> None:
+        db.rollback()
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([event.id for event in events]))
+            .values(attempts=OutboxEvent.attempts + 1)
+        )
+        db.commit()
+
+    def stats(self) -> dict:
+        return {"published": self.published, "failures": self.failures, "connected": self.connected}
+
+
+def build_publisher(broker: str = OUTBOX_BROKER):
+    if broker == "kafka":
+        return KafkaPublisher()
+    if broker == "memory":
+        return InMemoryPublisher()
+    raise ValueError(f"Unknown OUTBOX_BROKER: {broker}")
+
+
+# Shared relay started with the application
+outbox_relay = OutboxRelay(build_publisher())
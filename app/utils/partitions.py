@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.models.database import engine
+from app.utils.stats import forget_requests
+
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions kept ready beyond the current month; an insert outside every partition fails
+PARTITION_MONTHS_AHEAD = config("PARTITION_MONTHS_AHEAD", default=3, cast=int)
+# Seconds between checks for missing partitions (each worker, serialized by an advisory lock)
+PARTITION_MAINTENANCE_INTERVAL = config("PARTITION_MAINTENANCE_INTERVAL", default=3600.0, cast=float)
+PARTITION_MAINTENANCE_ENABLED = config("PARTITION_MAINTENANCE_ENABLED", default=True, cast=bool)
+# Partitions entirely older than this many months can be moved to the archive
+PARTITION_ARCHIVE_AFTER_MONTHS = config("PARTITION_ARCHIVE_AFTER_MONTHS", default=12, cast=int)
+# Give up instead of queueing behind long transactions on the parent (and blocking everyone behind us)
+PARTITION_LOCK_TIMEOUT = config("PARTITION_LOCK_TIMEOUT", default="5s")
+
+PARTITIONED_TABLE = "requests"
+ARCHIVE_TABLE = "requests_archive"
+# Partitions being moved to the archive, see archive_partitions()
+PENDING_TABLE = "requests_archive_pending"
+# pg_advisory_xact_lock key, so workers don't create the same partition concurrently
+MAINTENANCE_LOCK_KEY = 7265718
+BOUNDS = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    lower: Optional[datetime]  # None: MINVALUE
+    upper: Optional[datetime]  # None: MAXVALUE
+    detach_pending: bool = False
+
+    def overlaps(self, lower: datetime, upper: datetime) -> bool:
+        return (self.lower is None or self.lower < upper) and (self.upper is None or lower < self.upper)
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def _bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def is_partitioned(conn, table: str = PARTITIONED_TABLE) -> bool:
+    """False until migration e5c1a7d3b9f2 ran."""
+    return conn.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}) == "p"
+
+
+def list_partitions(conn, table: str = PARTITIONED_TABLE) -> List[Partition]:
+    """Partitions of `table` with their bounds, oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhdetachpending "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": table})
+    partitions = []
+    for name, bound, detach_pending in rows:
+        match = BOUNDS.search(bound or "")
+        if match:
+            partitions.append(Partition(name, _bound(match.group(1)), _bound(match.group(2)), detach_pending))
+    return sorted(partitions, key=lambda partition: partition.lower or datetime.min)
+
+
+def ensure_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD, start: Optional[datetime] = None) -> List[str]:
+    """
+    Create the missing monthly partitions from `start` (default: the current
+    month) to `months_ahead` months later, inside the caller's transaction.
+    Returns the names of the new ones; a no-op outside Postgres.
+
+    A partition is created as a plain table and then attached: ATTACH takes a
+    SHARE UPDATE EXCLUSIVE lock on the parent, so reads and writes go on,
+    where CREATE TABLE ... PARTITION OF would block them.
+    """
+    if conn.dialect.name != "postgresql" or not is_partitioned(conn):
+        return []
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+    existing = list_partitions(conn)
+    this_month = month_start(conn.scalar(text("SELECT localtimestamp")))
+    first = month_start(start) if start else this_month
+    last = add_months(this_month, months_ahead)
+
+    created = []
+    lower = first
+    while lower <= last:
+        upper = add_months(lower, 1)
+        if not any(partition.overlaps(lower, upper) for partition in existing):
+            name = partition_name(lower)
+            conn.execute(text(f"CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"))
+            conn.execute(text(
+                f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            ))
+            created.append(name)
+        lower = upper
+    return created
+
+
+def archive_partitions(engine, older_than_months: int = PARTITION_ARCHIVE_AFTER_MONTHS, force: bool = False,
+                       dry_run: bool = False) -> List[str]:
+    """
+    Move partitions whose whole range is older than `older_than_months` from
+    requests to requests_archive; they drop out of every API query. Partitions
+    that still hold open requests are skipped unless `force`.
+
+    DETACH ... CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on the
+    parent (it waits for running queries instead of blocking new ones) and
+    leaves a CHECK constraint behind, so attaching to the archive skips the
+    validation scan. It can't run in a transaction, hence the engine, and
+    each step commits on its own: a partition is recorded in
+    requests_archive_pending with its bounds before the detach, and every run
+    first finishes the recorded ones, wherever the previous run stopped.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    archived = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+        pending = [
+            Partition(name, lower, upper)
+            for name, lower, upper in conn.execute(text(
+                f"SELECT partition, lower, upper FROM {PENDING_TABLE} ORDER BY upper"
+            ))
+        ]
+        archived += [partition.name for partition in pending]
+        if not dry_run:
+            for partition in pending:
+                _finish_archive(conn, partition)
+
+        cutoff = add_months(month_start(conn.scalar(text("SELECT localtimestamp"))), -older_than_months)
+        for partition in list_partitions(conn):
+            if partition.upper is None or partition.upper > cutoff or partition.name in archived:
+                continue
+            if not force and conn.scalar(text(
+                f"SELECT EXISTS (SELECT 1 FROM {partition.name} WHERE status IS DISTINCT FROM 'closed')"
+            )):
+                logger.warning("Partition %s still has open requests, not archived", partition.name)
+                continue
+            archived.append(partition.name)
+            if dry_run:
+                continue
+            conn.execute(
+                text(f"INSERT INTO {PENDING_TABLE} (partition, lower, upper) VALUES (:name, :lower, :upper) "
+                     f"ON CONFLICT DO NOTHING"),
+                {"name": partition.name, "lower": partition.lower, "upper": partition.upper},
+            )
+            _finish_archive(conn, partition)
+        if not dry_run:
+            # Archive partitions attached by hand (or before the pending table existed) that are still counted
+            for partition in list_partitions(conn, ARCHIVE_TABLE):
+                forget_requests(conn, partition.name)
+    return archived
+
+
+def _finish_archive(conn, partition: Partition) -> None:
+    """
+    Take a recorded partition from wherever it is (still in requests, detach
+    pending, standalone, already in the archive) to the archive, out of the
+    counters, and drop its pending row. Every step is skipped once done.
+    """
+    parent = conn.execute(text(
+        "SELECT i.inhparent::regclass::text, i.inhdetachpending FROM pg_inherits i "
+        "WHERE i.inhrelid = to_regclass(:name)"
+    ), {"name": partition.name}).first()
+    if parent is not None and parent[0] == PARTITIONED_TABLE:
+        mode = "FINALIZE" if parent[1] else "CONCURRENTLY"
+        conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {partition.name} {mode}"))
+    if parent is None or parent[0] != ARCHIVE_TABLE:
+        lower = "MINVALUE" if partition.lower is None else f"'{partition.lower}'"
+        conn.execute(text(
+            f"ALTER TABLE {ARCHIVE_TABLE} ATTACH PARTITION {partition.name} "
+            f"FOR VALUES FROM ({lower}) TO ('{partition.upper}')"
+        ))
+    # The dashboard counts live requests only (one statement, a no-op if already done)
+    forget_requests(conn, partition.name)
+    conn.execute(text(f"DELETE FROM {PENDING_TABLE} WHERE partition = :name"), {"name": partition.name})
+
+
+class PartitionMaintainer:
+    """
+    Background task that keeps future partitions ready: checks on startup and
+    then every `interval` seconds. Failures (e.g. lock timeouts) are retried
+    on the next round, there are `months_ahead` months of slack.
+    """
+
+    def __init__(self, engine, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                 interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self.created = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> List[str]:
+        with self.engine.begin() as conn:
+            return ensure_partitions(conn, self.months_ahead)
+
+    async def start(self) -> None:
+        if self.engine.dialect.name == "postgresql":
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created = await run_in_threadpool(self.run_once)
+                self.created += len(created)
+                if created:
+                    logger.info("Created partitions %s", ", ".join(created))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("Partition maintenance failed, retrying in %.0fs", self.interval)
+            await asyncio.sleep(self.interval)
+
+
+# Shared instance started with the app
+partition_maintainer = PartitionMaintainer(engine)
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import orjson
+from decouple import config
+from sqlalchemy import func, select
+
+from app.models.database import DATABASE_URL, engine
+
+
+logger = logging.getLogger(__name__)
+
+# "postgres": creating transactions pg_notify() the event and every worker LISTENs, so
+# subscribers see requests created by any worker. "local": in-process only, a single worker
+PUSH_FANOUT = config("PUSH_FANOUT", default="postgres" if DATABASE_URL.startswith("postgresql") else "local")
+PUSH_CHANNEL = config("PUSH_CHANNEL", default="request_created")
+# Seconds between reconnect attempts of the LISTEN connection
+PUSH_LISTEN_RETRY = config("PUSH_LISTEN_RETRY", default=5.0, cast=float)
+
+# Events buffered per subscriber; a client that falls this far behind is disconnected
+# and catches up from the database when it reconnects with Last-Event-ID
+PUSH_BUFFER_SIZE = config("PUSH_BUFFER_SIZE", default=100, cast=int)
+# Seconds between SSE comments on idle connections, keeps proxies from closing them
+PUSH_HEARTBEAT_INTERVAL = config("PUSH_HEARTBEAT_INTERVAL", default=15.0, cast=float)
+# Subscriptions per worker, new ones get 503 beyond that
+PUSH_MAX_SUBSCRIBERS = config("PUSH_MAX_SUBSCRIBERS", default=50000, cast=int)
+# Missed requests replayed on reconnect, the newest ones; older are left to the listing
+PUSH_CATCH_UP_LIMIT = config("PUSH_CATCH_UP_LIMIT", default=500, cast=int)
+# Reconnect delay suggested to EventSource clients, ms
+PUSH_RETRY_MS = config("PUSH_RETRY_MS", default=3000, cast=int)
+
+
+class Subscriber:
+    """One open subscription. Idle cost is this object, an empty deque and an Event."""
+
+    __slots__ = ("role", "group", "events", "wake", "evicted")
+
+    def __init__(self, role: str, group: Optional[str]):
+        self.role = role
+        self.group = group
+        self.events: Deque[dict] = deque()
+        self.wake = asyncio.Event()
+        self.evicted = False
+
+    def matches(self, event: dict) -> bool:
+        if self.group is None:
+            return True
+        return any(executor["group"] == self.group for executor in event["assigned_executors"])
+
+
+class RequestHub:
+    """
+    Pub/sub for new requests: role -> subscribers, fan-out on the event loop.
+    With PUSH_FANOUT=local only requests created by this worker reach its
+    subscribers, so it is meant for a single worker. With PUSH_FANOUT=postgres
+    the creating transaction runs `notification()` and every worker's
+    `PostgresListener` delivers the event after the commit, whichever worker
+    created it. Reconnects with Last-Event-ID are caught up from the database.
+    """
+
+    def __init__(self, buffer_size: int = PUSH_BUFFER_SIZE, max_subscribers: int = PUSH_MAX_SUBSCRIBERS,
+                 heartbeat_interval: float = PUSH_HEARTBEAT_INTERVAL, fanout: str = PUSH_FANOUT,
+                 channel: str = PUSH_CHANNEL):
+        if fanout not in ("local", "postgres"):
+            raise ValueError(f"Unknown PUSH_FANOUT: {fanout}")
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat_interval = heartbeat_interval
+        self.fanout = fanout
+        self.channel = channel
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.count = 0
+        self.published = 0
+        self.delivered = 0
+        self.evicted = 0
+
+    def full(self) -> bool:
+        return self.count >= self.max_subscribers
+
+    def subscribe(self, role: str, group: Optional[str] = None) -> Subscriber:
+        """Register on the running loop, fan-out happens there."""
+        self._loop = asyncio.get_running_loop()
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = self._loop.create_task(self._heartbeats())
+        subscriber = Subscriber(role, group)
+        with self._lock:
+            self._subscribers.setdefault(role, set()).add(subscriber)
+            self.count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.role)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.role]
+            self.count -= 1
+
+    def notification(self, event: dict):
+        """Statement for the creating transaction (pg_notify is sent on commit), None for local fan-out."""
+        if self.fanout != "postgres":
+            return None
+        return select(func.pg_notify(self.channel, orjson.dumps(event).decode("utf-8")))
+
+    def publish(self, event: dict) -> None:
+        """Call after the commit; with postgres fan-out the event comes back through the listener instead."""
+        if self.fanout == "local":
+            self.deliver(event)
+
+    def deliver(self, event: dict) -> None:
+        """Queue `event` (see `request_event`) for the subscribers of its category, from any thread."""
+        loop = self._loop
+        if loop is None or event["category"] not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(event)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: dict) -> None:
+        self.published += 1
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["category"], ()))
+        for subscriber in subscribers:
+            if not subscriber.matches(event):
+                continue
+            if len(subscriber.events) >= self.buffer_size:
+                # Slow consumer: drop it rather than buffer without bound, it resumes from its last id
+                subscriber.evicted = True
+                self.evicted += 1
+                self.unsubscribe(subscriber)
+            else:
+                subscriber.events.append(event)
+                self.delivered += 1
+            subscriber.wake.set()
+
+    def evict_all(self) -> None:
+        """Disconnect every subscriber, they resume from their last id (events were lost)."""
+        with self._lock:
+            subscribers = [subscriber for role in self._subscribers.values() for subscriber in role]
+        for subscriber in subscribers:
+            subscriber.evicted = True
+            self.evicted += 1
+            self.unsubscribe(subscriber)
+            subscriber.wake.set()
+
+    async def _heartbeats(self) -> None:
+        """
+        One timer for all subscriptions instead of a wait_for() per connection:
+        wakes everyone, those with nothing to send write a heartbeat.
+        """
+        while self.count:
+            await asyncio.sleep(self.heartbeat_interval)
+            with self._lock:
+                subscribers = [subscriber for role in self._subscribers.values() for subscriber in role]
+            for subscriber in subscribers:
+                subscriber.wake.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            roles = len(self._subscribers)
+        return {
+            "fanout": self.fanout,
+            "subscribers": self.count,
+            "roles": roles,
+            "buffer_size": self.buffer_size,
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+            "evicted": self.evicted,
+        }
+
+
+class PostgresListener:
+    """
+    LISTENs on the push channel with a dedicated connection, read on the event
+    loop (add_reader, no thread), and hands every notification to the hub.
+    Notifications sent while it is disconnected are lost, so a lost connection
+    evicts all subscribers: they reconnect and catch up from the database.
+    """
+
+    def __init__(self, hub: RequestHub, engine=engine, retry_interval: float = PUSH_LISTEN_RETRY):
+        self.hub = hub
+        self.engine = engine
+        self.retry_interval = retry_interval
+        self.connected = False
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                conn = await asyncio.to_thread(self._connect)
+            except Exception:
+                self.failures += 1
+                logger.exception("Push listener could not connect, retrying in %.1fs", self.retry_interval)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            lost = loop.create_future()
+            fd = conn.fileno()
+            loop.add_reader(fd, self._drain, conn, lost)
+            self.connected = True
+            try:
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("Push listener lost its connection, reconnecting in %.1fs", self.retry_interval)
+            finally:
+                loop.remove_reader(fd)
+                self.connected = False
+                conn.close()
+                self.hub.evict_all()
+            await asyncio.sleep(self.retry_interval)
+
+    def _connect(self):
+        # A plain DBAPI (psycopg2) connection outside the pool: it stays open for the worker's lifetime
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        conn = self.engine.dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute('LISTEN "%s"' % self.hub.channel.replace('"', '""'))
+        return conn
+
+    def _drain(self, conn, lost: asyncio.Future) -> None:
+        try:
+            conn.poll()
+        except Exception as error:
+            if not lost.done():
+                lost.set_exception(error)
+            return
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self.hub.deliver(orjson.loads(notify.payload))
+
+    def stats(self) -> dict:
+        return {"connected": self.connected, "failures": self.failures}
+
+
+def request_event(request_id: int, title: str, category: str, user_id: Optional[int],
+                  assigned_executors: List[dict]) -> dict:
+    """Pushed payload, same shape as a listing item (LIST_FIELDS)."""
+    return {
+        "id": request_id,
+        "title": title,
+        "category": category,
+        "user_id": user_id,
+        "assigned_executors": assigned_executors,
+    }
+
+
+def format_sse(event: dict) -> bytes:
+    return b"id: %d\nevent: request.created\ndata: %s\n\n" % (event["id"], orjson.dumps(event))
+
+
+SSE_HEARTBEAT = b": ping\n\n"
+
+
+async def sse_stream(hub: RequestHub, role: str, group: Optional[str],
+                     catch_up: Callable[[int], Awaitable[List[dict]]], last_event_id: Optional[int]):
+    """
+    Body of a subscription: missed requests after `last_event_id`
+    (`catch_up(after_id)` returns at most PUSH_CATCH_UP_LIMIT of them, newest
+    first), then live events until the client goes away or is evicted.
+    Subscribing before the catch-up leaves no gap; events seen in both are
+    sent once.
+    """
+    subscriber = hub.subscribe(role, group)
+    try:
+        yield b"retry: %d\n\n" % PUSH_RETRY_MS
+        replayed: Set[int] = set()
+        if last_event_id is not None:
+            missed = await catch_up(last_event_id)
+            for event in reversed(missed):
+                if subscriber.matches(event):
+                    yield format_sse(event)
+            # Only live events buffered meanwhile can repeat the replay: keep the ids from the first of them on
+            if subscriber.events:
+                first_live = min(event["id"] for event in subscriber.events)
+                replayed = {event["id"] for event in missed if event["id"] >= first_live}
+
+        while True:
+            while subscriber.events:
+                event = subscriber.events.popleft()
+                if event["id"] in replayed:
+                    replayed.discard(event["id"])
+                else:
+                    yield format_sse(event)
+            if subscriber.evicted:
+                return
+            subscriber.wake.clear()
+            await subscriber.wake.wait()
+            if not subscriber.events and not subscriber.evicted:
+                yield SSE_HEARTBEAT
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# Shared instances: the hub used by the request routes, its listener started with the application
+request_hub = RequestHub()
+push_listener = PostgresListener(request_hub)
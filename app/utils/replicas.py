@@ -0,0 +1,112 @@
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine.url import make_url
+
+from app.utils.db_pool import pool_stats
+
+
+# Seconds of replay delay; 0 when the server is not a standby or has replayed everything it received
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    __slots__ = ("name", "engine", "down_until", "last_error", "lag", "lag_checked_at", "checkouts", "failures")
+
+    def __init__(self, engine):
+        self.name = make_url(str(engine.url)).render_as_string(hide_password=True)
+        self.engine = engine
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+        self.lag = 0.0
+        self.lag_checked_at = 0.0
+        self.checkouts = 0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin. A replica whose checkout fails, or whose
+    replay lag exceeds `max_lag`, is skipped for `retry_interval` seconds; the
+    first read after that probes it again. With no healthy replica `pick()`
+    returns None and callers read from the primary.
+    """
+
+    def __init__(self, engines: list, retry_interval: float, max_lag: float, lag_check_interval: float):
+        self.replicas: List[Replica] = [Replica(engine) for engine in engines]
+        self.retry_interval = retry_interval
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.primary_fallbacks = 0
+        self.sticky_reads = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.down_until <= now]
+        if not healthy:
+            if self.replicas:
+                with self._lock:
+                    self.primary_fallbacks += 1
+            return None
+        replica = healthy[next(self._next) % len(healthy)]
+        with self._lock:
+            replica.checkouts += 1
+        return replica
+
+    def count_sticky_read(self) -> None:
+        with self._lock:
+            self.sticky_reads += 1
+
+    def mark_down(self, replica: Replica, reason: str) -> None:
+        with self._lock:
+            replica.down_until = time.monotonic() + self.retry_interval
+            replica.last_error = reason
+            replica.failures += 1
+
+    def lag_check_due(self, replica: Replica) -> bool:
+        """Postgres only, at most once per `lag_check_interval` per replica."""
+        return (
+            self.max_lag > 0
+            and replica.engine.dialect.name == "postgresql"
+            and time.monotonic() - replica.lag_checked_at >= self.lag_check_interval
+        )
+
+    def record_lag(self, replica: Replica, lag: float) -> bool:
+        """Store a measured lag; False (and the replica is marked down) if it is too far behind."""
+        replica.lag = lag
+        replica.lag_checked_at = time.monotonic()
+        if lag > self.max_lag:
+            self.mark_down(replica, f"replication lag {lag:.1f}s")
+            return False
+        return True
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "primary_fallbacks": self.primary_fallbacks,
+                "sticky_reads": self.sticky_reads,
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "healthy": replica.down_until <= now,
+                        "last_error": replica.last_error,
+                        "lag": replica.lag,
+                        "checkouts": replica.checkouts,
+                        "failures": replica.failures,
+                        "pool": pool_stats(getattr(replica.engine, "sync_engine", replica.engine)),
+                    }
+                    for replica in self.replicas
+                ],
+            }
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from decouple import config
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from app.models.executor import Executor
+
+
+ROUTING_CACHE_MAX_SIZE = config("ROUTING_CACHE_MAX_SIZE", default=1024, cast=int)
+ROUTING_CACHE_TTL = config("ROUTING_CACHE_TTL", default=60.0, cast=float)
+
+# Built once; the role list is an expanding parameter, so one cached statement serves any number of roles
+EXECUTORS_BY_ROLES = (
+    select(Executor.id, Executor.name, Executor.group, Executor.role)
+    .where(Executor.role.in_(bindparam("roles", expanding=True)))
+    .order_by(Executor.id)
+)
+
+
+class ExecutorRoutingCache:
+    """
+    In-process cache: category -> executors (id, name, group) with that role.
+
+    Entries are loaded lazily, evicted in LRU order once `max_size` categories
+    are cached and reloaded after `ttl` seconds. Call `invalidate()` whenever the
+    executor roster changes; registered listeners are notified so the event can
+    be forwarded to other workers, which apply it with `invalidate(..., propagate=False)`.
+    """
+
+    def __init__(self, max_size: int = ROUTING_CACHE_MAX_SIZE, ttl: float = ROUTING_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+        # Bumped on every invalidation so loads started before it are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, category: str) -> List[dict]:
+        """Executors for one category."""
+        return self.get_many(db, [category])[category]
+
+    def get_many(self, db: Session, categories: Iterable[str]) -> Dict[str, List[dict]]:
+        """Executors for several categories; all misses are loaded with one query."""
+        result: Dict[str, List[dict]] = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            for category in set(categories):
+                entry = self._entries.get(category)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(category)
+                    result[category] = list(entry[1])
+                    self.hits += 1
+                else:
+                    missing.append(category)
+                    self.misses += 1
+
+        if missing:
+            loaded = self._load(db, missing)
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for category, executors in loaded.items():
+                    result[category] = executors
+                    if generation == self._generation:
+                        self._entries[category] = (expires_at, tuple(executors))
+                        self._entries.move_to_end(category)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def invalidate(self, category: Optional[str] = None, propagate: bool = True) -> None:
+        """Drop one category (or everything if None) and notify listeners."""
+        with self._lock:
+            if category is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(category, None)
+            self._generation += 1
+            self.invalidations += 1
+            listeners = list(self._listeners)
+
+        if propagate:
+            for listener in listeners:
+                listener(category)
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Register a callback, e.g. to broadcast invalidations to other workers."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _load(db: Session, categories: List[str]) -> Dict[str, List[dict]]:
+        grouped: Dict[str, List[dict]] = {category: [] for category in categories}
+        rows = db.connection().execute(EXECUTORS_BY_ROLES, {"roles": categories}).all()
+        for executor_id, name, group, role in rows:
+            grouped[role].append({"id": executor_id, "name": name, "group": group})
+        return grouped
+
+
+# Shared instance used by the routes
+routing_cache = ExecutorRoutingCache()
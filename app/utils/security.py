@@ -1,15 +1,17 @@
 import jwt
 from datetime import datetime, timedelta
 import random
-from bcrypt import hashpw, gensalt, checkpw
+from bcrypt import checkpw
 from typing import Optional
+from app.utils.hashing import password_hasher
+from app.utils.otp_store import build_otp_store
 
 
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 
-# Для хранения временных SMS-кодов (имитация базы)
-sms_codes = {}
+# Хранилище временных SMS-кодов (OTP_BACKEND: memory или sql)
+sms_codes = build_otp_store()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -26,20 +28,26 @@ def send_sms_code(mobile_number: str) -> bool:
     """Генерация и отправка SMS-кода"""
     mobile_number = mobile_number.strip()
     code = random.randint(1000, 9999)
-    sms_codes[mobile_number] = code
+    sms_codes.put(mobile_number, str(code))
     print(f"SMS code for {mobile_number}: {code}")  # Здесь будет отправка через SMS-сервис
     return True
 
 def verify_sms_code(mobile_number: str, code: str) -> bool:
     """Проверка SMS-кода"""
     mobile_number = mobile_number.strip() 
-    return sms_codes.get(mobile_number) == int(code)
+    return sms_codes.verify(mobile_number, code.strip())
 
 def hash_password(password: Optional[str]) -> Optional[str]:
     """Hash a password or return None if no password is provided."""
     if password is None:
         return None
-    return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+    return password_hasher.hash(password)
+
+async def hash_password_async(password: Optional[str]) -> Optional[str]:
+    """Async variant of hash_password for the async routes."""
+    if password is None:
+        return None
+    return await password_hasher.hash_async(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -0,0 +1,195 @@
+import random
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.models.executor import Executor
+from app.models.request import Request
+from app.models.stats import ExecutorStats, RequestStats
+from app.utils.inserts import increment_counters
+
+
+# Rows per counter key: more slots means less lock contention on busy categories, more rows to sum
+STATS_SLOTS = config("STATS_SLOTS", default=8, cast=int)
+
+REQUEST_KEY = ["category", "status", "slot"]
+EXECUTOR_KEY = ["role", "group", "slot"]
+
+
+def _request_deltas(db, changes: List[Tuple[str, Optional[str], int, Optional[int]]]):
+    """Upsert adding (category, status, count, budget) deltas to the counters, all in one slot."""
+    slot = random.randrange(STATS_SLOTS)
+    rows = [
+        {"category": category, "status": status or "", "slot": slot, "count": count,
+         "budget_total": (budget or 0) * count}
+        for category, status, count, budget in changes
+    ]
+    return increment_counters(db, RequestStats, REQUEST_KEY, rows, ["count", "budget_total"])
+
+
+def request_created(db, request: Request):
+    """Counter update for a new request (flushed, so its defaults are set); execute before commit."""
+    return _request_deltas(db, [(request.category, request.status, 1, request.budget)])
+
+
+def request_status_changed(db, category: str, budget: Optional[int], old_status: Optional[str], new_status: str):
+    return _request_deltas(db, [(category, old_status, -1, budget), (category, new_status, 1, budget)])
+
+
+def executors_registered(db, executors: Iterable[dict]):
+    """Counter update for new executors (dicts with role and group); execute before commit."""
+    counts = Counter((executor["role"], executor.get("group") or "") for executor in executors)
+    slot = random.randrange(STATS_SLOTS)
+    rows = [{"role": role, "group": group, "slot": slot, "count": count} for (role, group), count in counts.items()]
+    return increment_counters(db, ExecutorStats, EXECUTOR_KEY, rows, ["count"])
+
+
+def counted_rows(db: Session):
+    """(category, status, count, budget) and (role, group, count) from the counters, slots summed."""
+    requests = db.execute(
+        select(
+            RequestStats.category, RequestStats.status,
+            func.sum(RequestStats.count), func.sum(RequestStats.budget_total),
+        )
+        .group_by(RequestStats.category, RequestStats.status)
+    ).all()
+    executors = db.execute(
+        select(ExecutorStats.role, ExecutorStats.group, func.sum(ExecutorStats.count))
+        .group_by(ExecutorStats.role, ExecutorStats.group)
+    ).all()
+    # sum() of bigint is numeric on Postgres
+    return (
+        [(category, status, int(count), int(budget)) for category, status, count, budget in requests],
+        [(role, group, int(count)) for role, group, count in executors],
+    )
+
+
+def _recount_requests():
+    status = func.coalesce(Request.status, "")
+    return (
+        select(Request.category, status, func.count(), func.coalesce(func.sum(Request.budget), 0))
+        .group_by(Request.category, status)
+    )
+
+
+def _recount_executors():
+    group = func.coalesce(Executor.group, "")
+    return select(Executor.role, group, func.count()).group_by(Executor.role, group)
+
+
+def summarize(request_rows, executor_rows) -> dict:
+    """Dashboard shape: totals, requests by category -> status, executors by role -> group."""
+    by_category = {}
+    for category, status, count, budget in sorted(request_rows):
+        if not count and not budget:
+            continue
+        entry = by_category.setdefault(category, {"total": 0, "budget_total": 0, "by_status": {}})
+        entry["total"] += count
+        entry["budget_total"] += budget
+        entry["by_status"][status] = count
+    by_role = {}
+    for role, group, count in sorted(executor_rows):
+        if not count:
+            continue
+        entry = by_role.setdefault(role, {"total": 0, "by_group": {}})
+        entry["total"] += count
+        entry["by_group"][group] = count
+    return {
+        "requests": {
+            "total": sum(entry["total"] for entry in by_category.values()),
+            "budget_total": sum(entry["budget_total"] for entry in by_category.values()),
+            "by_category": by_category,
+        },
+        "executors": {
+            "total": sum(entry["total"] for entry in by_role.values()),
+            "by_role": by_role,
+        },
+    }
+
+
+def read_stats(db: Session) -> dict:
+    """Dashboard numbers from the counters: O(categories x statuses + roles x groups), whatever the table sizes."""
+    return summarize(*counted_rows(db))
+
+
+def _drift(counted, actual, zero: tuple) -> List[dict]:
+    """Keys whose counters differ from the recount; the key is all but the last len(zero) columns."""
+    size = -len(zero)
+    counted = {tuple(row[:size]): tuple(row[size:]) for row in counted}
+    actual = {tuple(row[:size]): tuple(row[size:]) for row in actual}
+    return [
+        {"key": list(key), "counted": list(counted.get(key, zero)), "actual": list(actual.get(key, zero))}
+        for key in sorted(counted.keys() | actual.keys())
+        if counted.get(key, zero) != actual.get(key, zero)
+    ]
+
+
+def verify_stats(db: Session) -> dict:
+    """
+    Recount requests and executors (full scans) and compare with the counters.
+    Both are read from one snapshot (REPEATABLE READ on Postgres) and the
+    counters change in the same transactions as the rows, so any difference
+    is real drift, not a write in flight. Must be the first use of `db`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    counted_requests, counted_executors = counted_rows(db)
+    actual_requests = db.execute(_recount_requests()).all()
+    actual_executors = db.execute(_recount_executors()).all()
+    drift = {
+        "requests": _drift(counted_requests, actual_requests, (0, 0)),
+        "executors": _drift(counted_executors, actual_executors, (0,)),
+    }
+    return {"ok": not drift["requests"] and not drift["executors"], "drift": drift}
+
+
+def rebuild_stats(db: Session) -> None:
+    """
+    Replace the counters with a full recount, in the caller's transaction.
+    On Postgres the counter tables are locked first: writers that want to
+    update them wait for the commit, so none of their changes is lost or
+    counted twice.
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if postgres:
+        db.execute(text("LOCK TABLE request_stats, executor_stats, request_stats_archived IN EXCLUSIVE MODE"))
+    db.execute(delete(RequestStats))
+    db.execute(delete(ExecutorStats))
+    recount = _recount_requests().subquery()
+    db.execute(insert(RequestStats).from_select(
+        ["category", "status", "slot", "count", "budget_total"],
+        select(*recount.c[:2], literal(0), *recount.c[2:]),
+    ))
+    recount = _recount_executors().subquery()
+    db.execute(insert(ExecutorStats).from_select(
+        ["role", "group", "slot", "count"],
+        select(*recount.c[:2], literal(0), *recount.c[2:]),
+    ))
+    if postgres:
+        # The recount has no archived rows: forget_requests() must not subtract them again
+        db.execute(text(
+            "INSERT INTO request_stats_archived (partition) "
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('requests_archive') ON CONFLICT DO NOTHING"
+        ))
+
+
+def forget_requests(conn, table: str) -> None:
+    """
+    Take the rows of `table`, a partition moved to the archive, out of the
+    request counters (Postgres). Claiming the partition in request_stats_archived
+    and subtracting are one statement: a rerun after a crash does it exactly once.
+    """
+    conn.execute(text(
+        f"WITH claimed AS (INSERT INTO request_stats_archived (partition) VALUES (:table) "
+        f"ON CONFLICT DO NOTHING RETURNING partition) "
+        f"INSERT INTO request_stats (category, status, slot, count, budget_total) "
+        f"SELECT category, coalesce(status, ''), 0, -count(*), -coalesce(sum(budget), 0) FROM {table} "
+        f"WHERE EXISTS (SELECT 1 FROM claimed) "
+        f"GROUP BY 1, 2 ORDER BY 1, 2 "
+        f"ON CONFLICT (category, status, slot) DO UPDATE SET count = request_stats.count + excluded.count, "
+        f"budget_total = request_stats.budget_total + excluded.budget_total"
+    ), {"table": table})
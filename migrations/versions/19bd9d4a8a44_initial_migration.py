@@ -19,10 +19,11 @@ depends_on = None
 def upgrade() -> None:
     """Upgrade migration logic."""
     # Drop requests first to handle dependency on users
-    op.drop_table('requests')  # Foreign key dependency on users handled
+    # IF EXISTS keeps a fresh database upgradable through the whole chain
+    op.execute("DROP TABLE IF EXISTS requests")  # Foreign key dependency on users handled
 
     # Drop users with CASCADE to ensure no dependency issues
-    op.execute("DROP TABLE users CASCADE")
+    op.execute("DROP TABLE IF EXISTS users CASCADE")
 
 
 def downgrade() -> None:
@@ -0,0 +1,39 @@
+"""Add outbox_events table
+
+Revision ID: 3f2a9c1d7e42
+Revises: 5c7d0e8a1b23
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e42'
+down_revision = '5c7d0e8a1b23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_id', 'outbox_events', ['id'], unique=False)
+    # The relay only ever scans unpublished rows
+    op.create_index('ix_outbox_events_unpublished', 'outbox_events', ['id'], unique=False,
+                    postgresql_where=sa.text('published_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_unpublished', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_id', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,77 @@
+"""Create users, executors and requests tables
+
+Revision ID: 5c7d0e8a1b23
+Revises: 19bd9d4a8a44
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7d0e8a1b23'
+down_revision = '19bd9d4a8a44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases built with Base.metadata.create_all already have these tables
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('mobile_number', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('company_name', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=True),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.Column('location', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('mobile_number')
+        )
+        op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    if 'executors' not in existing:
+        op.create_table('executors',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('mobile_number', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('company_name', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.Column('group', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_executors_id', 'executors', ['id'], unique=False)
+        op.create_index('ix_executors_mobile_number', 'executors', ['mobile_number'], unique=True)
+        op.create_index('ix_executors_email', 'executors', ['email'], unique=True)
+
+    if 'requests' not in existing:
+        op.create_table('requests',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('budget', sa.Integer(), nullable=True),
+            sa.Column('category', sa.String(), nullable=False),
+            sa.Column('approximate_time_required', sa.Integer(), nullable=True),
+            sa.Column('help_day', sa.String(), nullable=True),
+            sa.Column('preferred_time', sa.Time(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_requests_id', 'requests', ['id'], unique=False)
+        op.create_index('ix_requests_title', 'requests', ['title'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('requests')
+    op.drop_table('executors')
+    op.drop_table('users')
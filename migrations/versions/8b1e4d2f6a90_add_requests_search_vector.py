@@ -0,0 +1,36 @@
+"""Add full-text search vector on requests
+
+Revision ID: 8b1e4d2f6a90
+Revises: 3f2a9c1d7e42
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4d2f6a90'
+down_revision = '3f2a9c1d7e42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated column: title weighs more than description in ts_rank
+    op.execute(
+        """
+        ALTER TABLE requests ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index('ix_requests_search_vector', 'requests', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requests_search_vector', table_name='requests')
+    op.drop_column('requests', 'search_vector')
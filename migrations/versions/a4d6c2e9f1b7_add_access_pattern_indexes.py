@@ -0,0 +1,43 @@
+"""Add indexes for the hot query patterns
+
+Revision ID: a4d6c2e9f1b7
+Revises: 8b1e4d2f6a90
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d6c2e9f1b7'
+down_revision = '8b1e4d2f6a90'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) - each one backs a query checked by scripts/check_query_plans.py
+INDEXES = [
+    # GET /requests filtered by category (+ status), keyset on id
+    ('ix_requests_category_status_id', 'requests', ['category', 'status', 'id']),
+    # GET /requests filtered by status only, keyset on id
+    ('ix_requests_status_id', 'requests', ['status', 'id']),
+    # Requests of a user, FK checks on user delete
+    ('ix_requests_user_id', 'requests', ['user_id']),
+    # Routing cache / executor-by-role lookups, ordered by id
+    ('ix_executors_role_id', 'executors', ['role', 'id']),
+    # UserCRUD.filter_users_by_role
+    ('ix_users_role', 'users', ['role']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking writes on large tables, it can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # IF NOT EXISTS: tables created by Base.metadata.create_all already have them
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,34 @@
+"""Record partitions taken out of the dashboard counters
+
+Revision ID: b6e2d9a4c8f1
+Revises: f3a8c6e1d4b7
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d9a4c8f1'
+down_revision = 'f3a8c6e1d4b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('request_stats_archived',
+        sa.Column('partition', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('partition')
+    )
+    # Partitions archived so far were subtracted when they were moved
+    op.execute(
+        "INSERT INTO request_stats_archived (partition) "
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('requests_archive')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('request_stats_archived')
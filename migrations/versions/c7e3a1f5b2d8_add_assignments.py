@@ -0,0 +1,41 @@
+"""Add assignments table
+
+Revision ID: c7e3a1f5b2d8
+Revises: a4d6c2e9f1b7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e3a1f5b2d8'
+down_revision = 'a4d6c2e9f1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('executor_id', sa.Integer(), nullable=False),
+        sa.Column('assigned_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('closed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+        sa.ForeignKeyConstraint(['executor_id'], ['executors.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        # Also serves lookups of a request's executors (leading column)
+        sa.UniqueConstraint('request_id', 'executor_id', name='uq_assignments_request_executor')
+    )
+    op.create_index('ix_assignments_id', 'assignments', ['id'], unique=False)
+    # Open load per executor, read when the load index (re)loads a role
+    op.create_index('ix_assignments_open_executor', 'assignments', ['executor_id'], unique=False,
+                    postgresql_where=sa.text('closed_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assignments_open_executor', table_name='assignments')
+    op.drop_index('ix_assignments_id', table_name='assignments')
+    op.drop_table('assignments')
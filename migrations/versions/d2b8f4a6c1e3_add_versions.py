@@ -0,0 +1,31 @@
+"""Add version and updated_at to requests and executors
+
+Revision ID: d2b8f4a6c1e3
+Revises: c7e3a1f5b2d8
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8f4a6c1e3'
+down_revision = 'c7e3a1f5b2d8'
+branch_labels = None
+depends_on = None
+
+TABLES = ['requests', 'executors']
+
+
+def upgrade() -> None:
+    # Constant / now() defaults are stored in the catalog on Postgres 11+, no table rewrite
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
@@ -0,0 +1,29 @@
+"""Record partitions while they are moved to the archive
+
+Revision ID: d8f3b1c7e5a2
+Revises: b6e2d9a4c8f1
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f3b1c7e5a2'
+down_revision = 'b6e2d9a4c8f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('requests_archive_pending',
+        sa.Column('partition', sa.String(), nullable=False),
+        sa.Column('lower', sa.DateTime(), nullable=True),  # NULL: MINVALUE
+        sa.Column('upper', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('partition')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('requests_archive_pending')
@@ -0,0 +1,146 @@
+"""Partition requests by month on created_at
+
+Revision ID: e5c1a7d3b9f2
+Revises: d2b8f4a6c1e3
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c1a7d3b9f2'
+down_revision = 'd2b8f4a6c1e3'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of time here; afterwards app.utils.partitions keeps them coming
+MONTHS_AHEAD = 3
+
+# Same definitions as the plain table had (5c7d0e8a1b23, a4d6c2e9f1b7, 8b1e4d2f6a90)
+INDEXES = [
+    ('ix_requests_id', 'btree', ['id']),
+    ('ix_requests_title', 'btree', ['title']),
+    ('ix_requests_category_status_id', 'btree', ['category', 'status', 'id']),
+    ('ix_requests_status_id', 'btree', ['status', 'id']),
+    ('ix_requests_user_id', 'btree', ['user_id']),
+    ('ix_requests_search_vector', 'gin', ['search_vector']),
+]
+
+COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('requests_id_seq'::regclass),
+    user_id integer NOT NULL REFERENCES users (id),
+    title varchar NOT NULL,
+    description text NOT NULL,
+    status varchar,
+    budget integer,
+    category varchar NOT NULL,
+    approximate_time_required integer,
+    help_day varchar,
+    preferred_time time,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED,
+    version integer NOT NULL DEFAULT 1,
+    updated_at timestamp NOT NULL DEFAULT now(),
+    created_at timestamp NOT NULL DEFAULT now(),
+    closed_at timestamp
+"""
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def create_partition(lower: datetime) -> None:
+    upper = add_months(lower, 1)
+    op.execute(
+        f"CREATE TABLE requests_y{lower.year}m{lower.month:02d} PARTITION OF requests "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def upgrade() -> None:
+    # Existing rows get the migration time: there is nothing better to backfill from.
+    # IF NOT EXISTS / IF EXISTS below: the autocommit block commits, a failed run is re-run from there
+    op.execute("ALTER TABLE requests ADD COLUMN IF NOT EXISTS created_at timestamp NOT NULL DEFAULT now()")
+    op.execute("ALTER TABLE requests ADD COLUMN IF NOT EXISTS closed_at timestamp")
+
+    conn = op.get_bind()
+    this_month = conn.scalar(sa.text("SELECT date_trunc('month', localtimestamp)"))
+    # Old rows and inserts until the switch stay in one partition up to here. Two months
+    # rather than one, so a migration running over a month boundary can't reject inserts
+    legacy_upper = add_months(this_month, 2)
+    has_rows = conn.scalar(sa.text("SELECT EXISTS (SELECT 1 FROM requests)"))
+
+    if has_rows:
+        # The slow parts (index build, constraint scan) without blocking writes, ahead of the
+        # switch: the index becomes the (id, created_at) key ATTACH expects, the CHECK spares its scan
+        with op.get_context().autocommit_block():
+            op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS requests_legacy_id_created_at_key "
+                       "ON requests (id, created_at)")
+            op.execute("ALTER TABLE requests DROP CONSTRAINT IF EXISTS requests_legacy_created_at_check")
+            op.execute(f"ALTER TABLE requests ADD CONSTRAINT requests_legacy_created_at_check "
+                       f"CHECK (created_at < '{legacy_upper}') NOT VALID")
+            op.execute("ALTER TABLE requests VALIDATE CONSTRAINT requests_legacy_created_at_check")
+
+    # The switch itself: catalog changes only, under a short exclusive lock.
+    # A foreign key to a partitioned table must include the partition key, the
+    # assignments keep request_id unconstrained (they are written with the request)
+    op.drop_constraint('assignments_request_id_fkey', 'assignments', type_='foreignkey')
+    op.execute("ALTER TABLE requests RENAME TO requests_legacy")
+    op.execute("ALTER SEQUENCE requests_id_seq OWNED BY NONE")
+    for name, _, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name.replace('ix_requests_', 'ix_requests_legacy_')}")
+    # Checked again under the lock: rows may have arrived since
+    keep_legacy = conn.scalar(sa.text("SELECT EXISTS (SELECT 1 FROM requests_legacy)"))
+    if keep_legacy:
+        op.execute("CREATE UNIQUE INDEX IF NOT EXISTS requests_legacy_id_created_at_key "
+                   "ON requests_legacy (id, created_at)")
+        op.execute("ALTER TABLE requests_legacy DROP CONSTRAINT requests_pkey")
+        op.execute("ALTER TABLE requests_legacy ADD CONSTRAINT requests_legacy_pkey "
+                   "PRIMARY KEY USING INDEX requests_legacy_id_created_at_key")
+    else:
+        op.execute("DROP TABLE requests_legacy")
+
+    op.execute(f"CREATE TABLE requests ({COLUMNS}, CONSTRAINT requests_pkey PRIMARY KEY (id, created_at)) "
+               f"PARTITION BY RANGE (created_at)")
+    op.execute("ALTER SEQUENCE requests_id_seq OWNED BY requests.id")
+    for name, method, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON requests USING {method} ({', '.join(columns)})")
+
+    if keep_legacy:
+        op.execute(f"ALTER TABLE requests ATTACH PARTITION requests_legacy "
+                   f"FOR VALUES FROM (MINVALUE) TO ('{legacy_upper}')")
+        op.execute("ALTER TABLE requests_legacy DROP CONSTRAINT IF EXISTS requests_legacy_created_at_check")
+    first = legacy_upper if keep_legacy else this_month
+    for offset in range(MONTHS_AHEAD + 1):
+        create_partition(add_months(first, offset))
+
+    # Detached old partitions end up here (app.utils.partitions.archive_partitions)
+    op.execute("CREATE TABLE requests_archive (LIKE requests INCLUDING GENERATED) PARTITION BY RANGE (created_at)")
+
+
+def downgrade() -> None:
+    # Back to one plain table: copies every row, archived ones included
+    op.execute("CREATE TABLE requests_plain (LIKE requests INCLUDING DEFAULTS INCLUDING GENERATED)")
+    columns = ("id, user_id, title, description, status, budget, category, approximate_time_required, "
+               "help_day, preferred_time, version, updated_at, created_at, closed_at")
+    op.execute(f"INSERT INTO requests_plain ({columns}) SELECT {columns} FROM requests")
+    op.execute(f"INSERT INTO requests_plain ({columns}) SELECT {columns} FROM requests_archive")
+    op.execute("ALTER SEQUENCE requests_id_seq OWNED BY requests_plain.id")
+    op.execute("DROP TABLE requests_archive CASCADE")
+    op.execute("DROP TABLE requests CASCADE")
+    op.execute("ALTER TABLE requests_plain RENAME TO requests")
+    op.execute("ALTER TABLE requests ADD CONSTRAINT requests_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE requests ADD CONSTRAINT requests_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    for name, method, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON requests USING {method} ({', '.join(columns)})")
+    op.create_foreign_key('assignments_request_id_fkey', 'assignments', 'requests', ['request_id'], ['id'])
+    op.drop_column('requests', 'closed_at')
+    op.drop_column('requests', 'created_at')
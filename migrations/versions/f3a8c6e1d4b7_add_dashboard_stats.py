@@ -0,0 +1,48 @@
+"""Add dashboard counter tables
+
+Revision ID: f3a8c6e1d4b7
+Revises: e5c1a7d3b9f2
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c6e1d4b7'
+down_revision = 'e5c1a7d3b9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('request_stats',
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('slot', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('budget_total', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('category', 'status', 'slot')
+    )
+    op.create_table('executor_stats',
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('group', sa.String(), nullable=False),
+        sa.Column('slot', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('role', 'group', 'slot')
+    )
+    # Starting values, same recount as app.utils.stats.rebuild_stats
+    op.execute(
+        "INSERT INTO request_stats (category, status, slot, count, budget_total) "
+        "SELECT category, coalesce(status, ''), 0, count(*), coalesce(sum(budget), 0) FROM requests GROUP BY 1, 2"
+    )
+    op.execute(
+        "INSERT INTO executor_stats (role, \"group\", slot, count) "
+        "SELECT role, coalesce(\"group\", ''), 0, count(*) FROM executors GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('executor_stats')
+    op.drop_table('request_stats')
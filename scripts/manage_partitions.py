@@ -0,0 +1,70 @@
+"""
+Monthly partitions of the requests table.
+
+    python scripts/manage_partitions.py list
+    python scripts/manage_partitions.py ensure --months-ahead 6
+    python scripts/manage_partitions.py archive --older-than 12 --dry-run
+
+`ensure` creates missing future partitions (the app does this on its own, see
+PARTITION_MAINTENANCE_INTERVAL); `archive` moves old partitions to
+requests_archive with DETACH PARTITION ... CONCURRENTLY. Uses DATABASE_URL
+unless --database-url is given.
+"""
+import argparse
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.models.database import DATABASE_URL  # noqa: E402
+from app.utils.partitions import (  # noqa: E402
+    ARCHIVE_TABLE, PARTITION_ARCHIVE_AFTER_MONTHS, PARTITION_MONTHS_AHEAD, PARTITIONED_TABLE,
+    archive_partitions, ensure_partitions, list_partitions,
+)
+
+
+def show(conn, table: str) -> None:
+    for partition in list_partitions(conn, table):
+        lower = partition.lower or "MINVALUE"
+        upper = partition.upper or "MAXVALUE"
+        pending = " (detach pending)" if partition.detach_pending else ""
+        print(f"{table}  {partition.name}  [{lower}, {upper}){pending}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Partitions of requests and requests_archive")
+    ensure = commands.add_parser("ensure", help="Create missing monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    archive = commands.add_parser("archive", help="Move old partitions to requests_archive")
+    archive.add_argument("--older-than", type=int, default=PARTITION_ARCHIVE_AFTER_MONTHS, help="Months")
+    archive.add_argument("--force", action="store_true", help="Also archive partitions with open requests")
+    archive.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        parser.error("requests is partitioned on Postgres only")
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            show(conn, PARTITIONED_TABLE)
+            show(conn, ARCHIVE_TABLE)
+    elif args.command == "ensure":
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, args.months_ahead)
+        print(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+    else:
+        archived = archive_partitions(engine, args.older_than, force=args.force, dry_run=args.dry_run)
+        verb = "Would archive" if args.dry_run else "Archived"
+        print(f"{verb} {len(archived)} partitions: {', '.join(archived) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Settings are read at import time: keep the tests off Postgres and Kafka
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "False")
+os.environ.setdefault("OUTBOX_BROKER", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
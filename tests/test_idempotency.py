@@ -0,0 +1,144 @@
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+
+from app.utils.idempotency import (
+    IdempotencyGuard, IdempotencyMiddleware, MemoryIdempotencyStore, SQLIdempotencyStore, StoredResponse,
+)
+
+
+class CreateApp:
+    """Dummy ASGI create endpoint: answers with the status and after the delay given in the JSON body."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        payload = json.loads(message["body"] or b"{}")
+        self.calls += 1
+        await asyncio.sleep(payload.get("delay", 0))
+        body = json.dumps({"call": self.calls}).encode()
+        await send({"type": "http.response.start", "status": payload.get("status", 201),
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture
+def app():
+    return CreateApp()
+
+
+@pytest.fixture
+def guard():
+    return IdempotencyGuard(MemoryIdempotencyStore(), enabled=True, wait_timeout=2.0)
+
+
+K1 = str(uuid.uuid4())
+
+
+def post(app, guard, *requests, path="/requests/requests", headers=None):
+    """Send the (key, body) requests concurrently through the middleware."""
+    async def run():
+        transport = httpx.ASGITransport(app=IdempotencyMiddleware(app, guard))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post(path, json=body, headers={**(headers or {}), **({"Idempotency-Key": key} if key else {})})
+                for key, body in requests
+            ))
+    return asyncio.run(run())
+
+
+def test_retry_is_replayed(app, guard):
+    first, = post(app, guard, (K1, {"title": "a"}))
+    retry, = post(app, guard, (K1, {"title": "a"}))
+
+    assert app.calls == 1
+    assert (retry.status_code, retry.json()) == (first.status_code, first.json()) == (201, {"call": 1})
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert guard.replays == 1
+
+
+def test_requests_without_key_pass_through(app, guard):
+    post(app, guard, (None, {"title": "a"}), (None, {"title": "a"}))
+    assert app.calls == 2
+    assert guard.store.size() == 0
+
+
+def test_concurrent_duplicate_waits_for_the_first(app, guard):
+    responses = post(app, guard, (K1, {"title": "a", "delay": 0.2}), (K1, {"title": "a", "delay": 0.2}))
+
+    assert app.calls == 1
+    assert [response.status_code for response in responses] == [201, 201]
+    assert [response.json() for response in responses] == [{"call": 1}, {"call": 1}]
+    assert sorted(response.headers.get("idempotent-replayed", "") for response in responses) == ["", "true"]
+    assert guard.waits == 1
+
+
+def test_duplicate_gets_409_after_wait_timeout(app):
+    guard = IdempotencyGuard(MemoryIdempotencyStore(), enabled=True, wait_timeout=0.05)
+    first, duplicate = post(app, guard, (K1, {"delay": 0.3}), (K1, {"delay": 0.3}))
+
+    assert first.status_code == 201
+    assert duplicate.status_code == 409
+    assert duplicate.headers["retry-after"] == "1"
+
+
+def test_same_key_other_request_is_rejected(app, guard):
+    post(app, guard, (K1, {"title": "a"}))
+    other, = post(app, guard, (K1, {"title": "b"}))
+
+    assert other.status_code == 422
+    assert app.calls == 1
+
+
+def test_keys_are_scoped_by_route_and_caller(app, guard):
+    post(app, guard, (K1, {"title": "a"}))
+    post(app, guard, (K1, {"title": "a"}), path="/users/users/register")
+    post(app, guard, (K1, {"title": "a"}), headers={"Authorization": "Bearer other"})
+
+    assert app.calls == 3
+    assert guard.replays == 0
+
+
+def test_short_anonymous_key_is_rejected(app, guard):
+    anonymous, = post(app, guard, ("k1", {"title": "a"}))
+    authorized, = post(app, guard, ("k1", {"title": "a"}), headers={"Authorization": "Bearer token"})
+
+    assert anonymous.status_code == 400
+    assert authorized.status_code == 201
+    assert app.calls == 1
+
+
+def test_server_error_releases_the_key(app, guard):
+    failed, = post(app, guard, (K1, {"status": 503}))
+    retry, = post(app, guard, (K1, {"status": 503}))
+
+    assert failed.status_code == retry.status_code == 503
+    assert "idempotent-replayed" not in retry.headers
+    assert app.calls == 2
+    assert guard.released == 2
+    assert guard.store.size() == 0
+
+
+@pytest.mark.parametrize("store", ["memory", "sql"])
+def test_eviction_keeps_running_claims(store, tmp_path):
+    if store == "memory":
+        store = MemoryIdempotencyStore(max_entries=2, sweep_interval=0)
+    else:
+        store = SQLIdempotencyStore(f"sqlite:///{tmp_path / 'keys.db'}", max_entries=2, sweep_interval=0)
+    response = StoredResponse(201, [], b"{}")
+
+    assert store.begin("running", "f")[0] == "started"
+    for key in ("a", "b", "c"):
+        assert store.begin(key, "f")[0] == "started"
+        store.complete(key, response)
+    store.sweep()
+
+    assert store.begin("running", "f")[0] == "in_progress"
+    assert store.begin("c", "f") == ("replay", response)
+    assert store.evictions >= 2
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.outbox import OutboxEvent
+from app.utils import outbox
+from app.utils.outbox import InMemoryPublisher, OutboxRelay
+
+
+class FlakyPublisher(InMemoryPublisher):
+    """Fails the first `failures` calls of start() / publish_batch()."""
+
+    def __init__(self, start_failures: int = 0, publish_failures: int = 0):
+        super().__init__()
+        self.start_failures = start_failures
+        self.publish_failures = publish_failures
+        self.starts = 0
+
+    async def start(self) -> None:
+        self.starts += 1
+        if self.start_failures:
+            self.start_failures -= 1
+            raise ConnectionError("broker unreachable")
+
+    async def publish_batch(self, events) -> None:
+        if self.publish_failures:
+            self.publish_failures -= 1
+            raise ConnectionError("broker unreachable")
+        await super().publish_batch(events)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    OutboxEvent.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def add_events(session_factory, count: int) -> None:
+    with session_factory() as db:
+        db.add_all(
+            OutboxEvent(topic="request-created", key="plumbing", payload=json.dumps({"request_id": i}), attempts=0)
+            for i in range(count)
+        )
+        db.commit()
+
+
+def events(session_factory):
+    with session_factory() as db:
+        return db.scalars(select(OutboxEvent).order_by(OutboxEvent.id)).all()
+
+
+def test_relay_once_publishes_and_marks_sent(session_factory):
+    add_events(session_factory, 3)
+    publisher = InMemoryPublisher()
+    relay = OutboxRelay(publisher, batch_size=2, session_factory=session_factory)
+
+    assert asyncio.run(relay.relay_once()) == 2
+    assert asyncio.run(relay.relay_once()) == 1
+    assert asyncio.run(relay.relay_once()) == 0
+
+    assert [json.loads(payload)["request_id"] for _, _, payload in publisher.messages] == [0, 1, 2]
+    assert all(topic == "request-created" and key == "plumbing" for topic, key, _ in publisher.messages)
+    assert all(event.published_at is not None and event.attempts == 1 for event in events(session_factory))
+    assert relay.stats()["published"] == 3
+
+
+def test_failed_batch_stays_unpublished(session_factory):
+    add_events(session_factory, 2)
+    publisher = FlakyPublisher(publish_failures=1)
+    relay = OutboxRelay(publisher, session_factory=session_factory)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(relay.relay_once())
+    assert all(event.published_at is None and event.attempts == 1 for event in events(session_factory))
+
+    # Claimed again on the next pass
+    assert asyncio.run(relay.relay_once()) == 2
+    assert all(event.published_at is not None and event.attempts == 2 for event in events(session_factory))
+    assert len(publisher.messages) == 2
+
+
+def test_run_backs_off_and_recovers(session_factory, monkeypatch):
+    add_events(session_factory, 1)
+    publisher = FlakyPublisher(start_failures=2, publish_failures=2)
+    relay = OutboxRelay(publisher, poll_interval=0.5, session_factory=session_factory)
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_BACKOFF", 3.0)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) == 6:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(outbox.asyncio, "sleep", sleep)
+
+    async def run():
+        # A broker that is down must not fail startup
+        await relay.start()
+        with pytest.raises(asyncio.CancelledError):
+            await relay._task
+        relay._task = None
+        await relay.stop()
+
+    asyncio.run(run())
+
+    # Two failed connects and two failed batches double the delay up to the cap, success resets it
+    assert delays == [1.0, 2.0, 3.0, 3.0, 0.5, 0.5]
+    assert relay.failures == 4
+    assert publisher.starts == 3
+    assert not relay.connected
+    assert [event.published_at is not None for event in events(session_factory)] == [True]